@@ -3,38 +3,52 @@ from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
 from flask_wtf.csrf import CSRFProtect
+from werkzeug.middleware.proxy_fix import ProxyFix
 from dotenv import load_dotenv
-import os
+import click
+
+from config import get_config, configure_engines
+from app.services.db_routing import RoutingSession
 
 load_dotenv()
 
-db = SQLAlchemy()
+# Read-only views opt in to the replica with @use_replica
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 login_manager = LoginManager()
 login_manager.login_view = 'auth.login'
 login_manager.login_message_category = 'info'
 csrf = CSRFProtect()
 
 
-def create_app():
+def create_app(config_class=None):
     app = Flask(__name__)
 
-    # Directly set config
-    app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'mysecretkey')
-    app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('SQLALCHEMY_DATABASE_URI')
-    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    # Settings live in config.py; APP_ENV picks development/production/testing
+    app.config.from_object(config_class or get_config())
+    configure_engines(app.config)
+
+    # Behind a proxy, remote_addr is the proxy's; take the client from the
+    # forwarded headers the configured hops append
+    hops = app.config.get('TRUSTED_PROXY_HOPS', 0)
+    if hops:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=hops, x_proto=hops, x_host=hops)
     
     # Initialize extensions
     db.init_app(app)
     login_manager.init_app(app)
     csrf.init_app(app)
+
+    from app.services import jobs, content_cache, chat_store, faq_cache, throttle, metrics
+    jobs.init_app(app)
+    content_cache.init_app(app)
+    chat_store.init_app(app)
+    faq_cache.init_app(app)
+    throttle.init_app(app)
+    metrics.init_app(app)
     
-    # Import models here to avoid circular imports
-    from app.models import User, Institute
-    
-    # User loader callback
-    @login_manager.user_loader
-    def load_user(user_id):
-        return User.query.get(int(user_id))
+    # User loader callback: one joined query, then a short per-process cache
+    from app.services.identity import load_user
+    login_manager.user_loader(load_user)
     
     # Register blueprints
     from app.routes.auth import bp as auth_bp
@@ -48,9 +62,26 @@ def create_app():
     app.register_blueprint(teacher_bp, url_prefix='/teacher')
     app.register_blueprint(govt_bp, url_prefix='/govt')
     app.register_blueprint(main_bp)
+
+    # CLI commands
+    from app.bench import bench_cli
+    from app.commands import faq_cli, schema_cli, progress_cli, roster_cli
+    app.cli.add_command(bench_cli)
+    app.cli.add_command(faq_cli)
+    app.cli.add_command(schema_cli)
+    app.cli.add_command(progress_cli)
+    app.cli.add_command(roster_cli)
     
-    # Create database tables
+    # The schema is created and migrated by `flask schema upgrade`; workers
+    # only check the version stamp. Under the flask CLI a mismatch is just
+    # logged so the upgrade command itself can run.
+    from app import schema
     with app.app_context():
-        db.create_all()
+        try:
+            schema.verify()
+        except schema.SchemaError as e:
+            if click.get_current_context(silent=True) is None:
+                raise
+            app.logger.warning(str(e))
     
     return app
\ No newline at end of file
@@ -0,0 +1,789 @@
+# app/bench.py
+import io
+import math
+import os
+import subprocess
+import sys
+import time
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+bench_cli = AppGroup("bench", help="Performance benchmarks.")
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+# ---------- Synthetic data ----------
+def make_synthetic_pdf(pages, words_per_page=400, title=None):
+    """Build an uncompressed text PDF with ``pages`` pages, without extra dependencies.
+
+    A ``title`` is written at the top of the first page, which makes the
+    text (and so every cache key derived from it) unique.
+    """
+    words = "earthquake flood evacuation route shelter kit drill safety first aid".split()
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>"]
+    kids = " ".join(f"{3 + i * 2} 0 R" for i in range(pages))
+    objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {pages} >>".encode())
+    font_id = 3 + pages * 2
+    for i in range(pages):
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents {4 + i * 2} 0 R "
+            f"/Resources << /Font << /F1 {font_id} 0 R >> >> >>".encode()
+        )
+        lines = [f"({title}) Tj 0 -14 Td"] if title and i == 0 else []
+        for line in range(words_per_page // 10):
+            text = " ".join(words[(i + line + k) % len(words)] for k in range(10))
+            lines.append(f"({text}.) Tj 0 -14 Td")
+        stream = ("BT /F1 10 Tf 40 760 Td " + " ".join(lines) + " ET").encode()
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for number, obj in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + obj + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return out
+
+
+# ---------- PDF extraction ----------
+@bench_cli.command("pdf")
+@click.option("--pages", default=500, show_default=True, help="Pages in the synthetic PDF.")
+@click.option("--workers", default=None, type=int, help="Process pool size for the parallel run.")
+def bench_pdf(pages, workers):
+    """Compare full, budgeted and page-parallel PDF text extraction."""
+    import PyPDF2
+    from app.services import pdf_text
+    from app.services.summarizer import MAX_INPUT_CHARS
+
+    pdf_bytes = make_synthetic_pdf(pages)
+    click.echo(f"Synthetic PDF: {pages} pages, {len(pdf_bytes) / 1024 / 1024:.1f} MB")
+
+    def concatenate_all():
+        # Previous behaviour: repeated string concatenation over every page
+        text = ""
+        for page in PyPDF2.PdfReader(io.BytesIO(pdf_bytes)).pages:
+            text += page.extract_text() + "\n"
+        return text
+
+    text, elapsed = timed(concatenate_all)
+    click.echo(f"  concatenate all pages   {elapsed * 1000:9.1f} ms  {len(text)} chars")
+
+    text, elapsed = timed(pdf_text.collect_pages, pdf_text.iter_pdf_pages(io.BytesIO(pdf_bytes)))
+    click.echo(f"  streaming, all pages    {elapsed * 1000:9.1f} ms  {len(text)} chars")
+
+    text, elapsed = timed(pdf_text.collect_pages,
+                          pdf_text.iter_pdf_pages(io.BytesIO(pdf_bytes)), MAX_INPUT_CHARS)
+    click.echo(f"  streaming, budgeted     {elapsed * 1000:9.1f} ms  {len(text)} chars")
+
+    workers = workers or pdf_text.PDF_WORKERS
+    with pdf_text.make_pool(workers) as pool:
+        # Start the workers first so the timing matches a warm shared pool
+        list(pool.map(abs, range(workers)))
+        text, elapsed = timed(pdf_text.collect_pages,
+                              pdf_text.iter_pdf_pages_parallel(pdf_bytes, pages, workers, pool))
+    click.echo(f"  parallel x{workers}, all pages {elapsed * 1000:9.1f} ms  {len(text)} chars")
+
+
+# ---------- Chunked summarisation ----------
+class FakeLLM:
+    """Offline stand-in for the Groq client: sleeps, then echoes the start of the prompt."""
+
+    def __init__(self, latency=0.2):
+        self.latency = latency
+        self.calls = 0
+
+    def complete(self, system_prompt, user_prompt, max_tokens):
+        self.calls += 1
+        time.sleep(self.latency)
+        return user_prompt.split("\n\n", 1)[-1][:max_tokens]
+
+
+@bench_cli.command("summarize")
+@click.option("--chars", default=150000, show_default=True, help="Length of the synthetic transcript.")
+@click.option("--latency", default=0.2, show_default=True, help="Simulated seconds per LLM call.")
+def bench_summarize(chars, latency):
+    """Run the map-reduce summariser against a fake LLM and report stage latency."""
+    from app.services.chunked_summary import ChunkedSummarizer
+    from app.services.summarizer import CHUNK_TOKENS, SUMMARY_WORKERS
+
+    sentence = "During an earthquake, drop to the ground, take cover and hold on until the shaking stops. "
+    text = (sentence * (chars // len(sentence) + 1))[:chars]
+
+    llm = FakeLLM(latency)
+    summarizer = ChunkedSummarizer(llm, chunk_tokens=CHUNK_TOKENS, max_workers=SUMMARY_WORKERS)
+    summary, timings = summarizer.summarize(text, "Summarize.", "video")
+
+    click.echo(f"{chars} chars -> {timings['chunks']} chunks, {llm.calls} LLM calls, "
+               f"{len(summary)} char summary")
+    for stage, seconds in timings.items():
+        if stage != "chunks":
+            click.echo(f"  {stage:<10} {seconds * 1000:9.1f} ms")
+
+
+# ---------- Worker startup ----------
+# Clients that should only be imported on first use, never by create_app()
+LAZY_MODULES = ("google.generativeai", "groq", "yt_dlp", "youtube_transcript_api", "PyPDF2")
+
+
+@bench_cli.command("import-time")
+@click.option("--budget", default=2.0, show_default=True,
+              help="Seconds allowed for importing the app and running create_app().")
+@click.option("--top", default=10, show_default=True, help="Slowest top-level imports to list.")
+def bench_import_time(budget, top):
+    """Measure worker startup with python -X importtime; exits 1 over budget."""
+    code = (
+        "import time; start = time.perf_counter(); "
+        "from app import create_app; create_app(); "
+        "print(time.perf_counter() - start)"
+    )
+    project_root = os.path.dirname(current_app.root_path)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=project_root, capture_output=True, text=True, env=os.environ.copy()
+    )
+    if result.returncode != 0:
+        click.echo(result.stderr[-2000:], err=True)
+        raise SystemExit(result.returncode)
+
+    # Lines look like "import time:  self_us | cumulative_us |   package.module",
+    # with nesting shown by extra indentation of the module name
+    imports = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, raw_name = line[len("import time:"):].split("|")
+        depth = (len(raw_name) - len(raw_name.lstrip())) // 2
+        imports.append((int(cumulative_us), depth, raw_name.strip()))
+
+    elapsed = float(result.stdout.strip().splitlines()[-1])
+    click.echo(f"create_app() ready in {elapsed:.2f}s (budget {budget:.2f}s)")
+
+    top_level = sorted((i for i in imports if i[1] == 0), reverse=True)[:top]
+    for cumulative_us, _, name in top_level:
+        click.echo(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+
+    loaded = {name for _, _, name in imports}
+    eager = [name for name in LAZY_MODULES if name in loaded]
+    if eager:
+        click.echo(f"Imported at startup but should be lazy: {', '.join(eager)}")
+
+    if elapsed > budget:
+        click.echo("Startup is over budget.", err=True)
+        raise SystemExit(1)
+
+
+# ---------- Query plans ----------
+def capture_sql(engine, func):
+    """Run ``func`` and return the (statement, parameters) pairs it executed."""
+    from sqlalchemy import event
+
+    captured = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if not executemany:
+            captured.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        func()
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    return captured
+
+
+@bench_cli.command("query-plans")
+@click.option("--drills", default=8, show_default=True, type=click.IntRange(min=1),
+              help="Drills to seed per institute.")
+@click.option("--questions", default=5, show_default=True, type=click.IntRange(min=1),
+              help="Questions to seed per virtual drill.")
+def bench_query_plans(drills, questions):
+    """EXPLAIN QUERY PLAN the drills page queries on SQLite; exits 1 on a full table scan.
+
+    Runs against a throwaway SQLite database seeded with a few institutes,
+    so the question and option loads (skipped when there are no drills)
+    are planned too; exits 1 if any of the expected queries did not run.
+    """
+    import tempfile
+    from app import db, schema
+    from app.models import DrillParticipation, Option, Question, Student, User
+    from app.services import drills as drill_service
+    from app.services.reference_cache import reference_cache
+
+    with tempfile.TemporaryDirectory() as workdir:
+        app = _bench_app(f"sqlite:///{workdir}/plans.db", workdir)
+        with app.app_context():
+            schema.upgrade()
+            layout = seed_load_data(db.engine, 3, 20, drills, questions, 3)
+            reference_cache.invalidate()
+            institute_id = 2
+            user_id = db.session.query(User.id).filter_by(email=layout[institute_id]["students"][0]).scalar()
+            drill_id = next(iter(layout[institute_id]["drills"]))
+
+            def drills_page():
+                Student.query.filter_by(user_id=user_id).first()
+                drill_service.get_institute_drills(institute_id)
+                drill_service.invalidate_answer_key(drill_id)
+                drill_service.get_answer_key(drill_id)
+                DrillParticipation.query.filter_by(user_id=user_id).all()
+                DrillParticipation.query.filter_by(user_id=user_id, drill_id=drill_id).first()
+
+            engine = db.engine
+            statements = capture_sql(engine, drills_page)
+            db.session.rollback()
+
+            failures = 0
+            with engine.connect() as conn:
+                for statement, parameters in statements:
+                    plan = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).fetchall()
+                    details = [row[-1] for row in plan]
+                    full_scans = [d for d in details if d.startswith("SCAN ") and "USING" not in d]
+                    failures += bool(full_scans)
+
+                    click.echo(("FULL SCAN " if full_scans else "ok        ") + " ".join(statement.split())[:100])
+                    for detail in details:
+                        click.echo(f"            {detail}")
+            engine.dispose()
+
+    # The eager loads only run when there is something to load; make sure they were planned
+    missing = [
+        name for name, table in (("questions", Question.__tablename__), ("options", Option.__tablename__))
+        if not any(f"FROM {table}" in statement for statement, _ in statements)
+    ]
+    for name in missing:
+        click.echo(f"The {name} query did not run; nothing was checked for it.", err=True)
+    if failures:
+        click.echo(f"{failures} of {len(statements)} queries scan a whole table.", err=True)
+    if failures or missing:
+        raise SystemExit(1)
+    click.echo(f"All {len(statements)} queries use indexes.")
+
+
+# ---------- Drills page queries ----------
+# Statements one drills-page request runs, whatever the number of drills
+# and questions (the user and badges come from the identity and reference
+# caches). GET: drills, questions, options, participations (4). POST adds
+# the submitted drill, its answer key (cold), the existing participation,
+# the participation write and the progress upsert (9 in all). The budget
+# is exact on purpose: a new statement on this path should be a
+# deliberate change here, not something absorbed by headroom.
+DRILLS_PAGE_MAX_QUERIES = 9
+
+
+@bench_cli.command("drills-queries")
+@click.option("--sizes", default="2x2,10x5,40x10", show_default=True,
+              help="Comma-separated drills x questions-per-drill to seed.")
+@click.option("--max-queries", default=DRILLS_PAGE_MAX_QUERIES, show_default=True,
+              help="Most SQL statements a drills-page request may run.")
+def bench_drills_queries(sizes, max_queries):
+    """Count SQL statements per /student/drills request as drills and questions grow.
+
+    Each size gets a fresh SQLite database with one student. The GET is
+    measured after a warm-up request, the POST with a cold answer key.
+    Exits 1 when a request runs more than --max-queries statements or the
+    count changes with the size (an N+1 query).
+    """
+    import tempfile
+    from app import db, schema
+    from app.services.drills import answer_key_cache
+    from app.services.identity import identity_cache
+    from app.services.reference_cache import reference_cache
+
+    try:
+        shapes = [tuple(int(n) for n in size.split("x")) for size in sizes.split(",")]
+    except ValueError:
+        raise click.BadParameter("expected sizes like 2x2,10x5", param_hint="--sizes")
+
+    counts = {}
+    click.echo(f"{'drills':>6} {'questions':>9} {'GET':>5} {'POST':>5}")
+    for drills, questions in shapes:
+        with tempfile.TemporaryDirectory() as workdir:
+            app = _bench_app(f"sqlite:///{workdir}/drills.db", workdir)
+            # Databases are recreated per size; ids repeat, so nothing cached may carry over
+            for cache in (answer_key_cache, identity_cache, reference_cache):
+                cache.invalidate()
+            with app.app_context():
+                schema.upgrade()
+                layout = seed_load_data(db.engine, 1, 1, drills, questions, 0)
+                counter = QueryCounter(db.engine)
+            school = layout[1]
+            drill_id, answer_key = next(iter(school["drills"].items()))
+            form = {"drill_id": drill_id, **{f"question_{q}": o for q, o in answer_key.items()}}
+
+            client = app.test_client()
+            client.post("/auth/login", data={"email": school["students"][0], "password": LOAD_PASSWORD,
+                                             "role": "student"})
+            client.get("/student/drills")
+            counter.reset()
+            if client.get("/student/drills").status_code != 200:
+                raise click.ClickException("GET /student/drills failed")
+            get_count = counter.count
+            counter.reset()
+            if client.post("/student/drills", data=form).status_code != 200:
+                raise click.ClickException("POST /student/drills failed")
+            counts[(drills, questions)] = (get_count, counter.count)
+            with app.app_context():
+                db.engine.dispose()
+        click.echo(f"{drills:>6} {questions:>9} {get_count:>5} {counts[(drills, questions)][1]:>5}")
+
+    failures = []
+    if len(set(counts.values())) > 1:
+        failures.append("statement counts change with the number of drills or questions")
+    worst = max(max(pair) for pair in counts.values())
+    if worst > max_queries:
+        failures.append(f"{worst} statements in one request, more than {max_queries}")
+    for failure in failures:
+        click.echo(f"FAIL: {failure}")
+    if failures:
+        raise SystemExit(1)
+    click.echo(f"OK: at most {worst} statements per request")
+
+
+# ---------- Streaming export ----------
+@bench_cli.command("export")
+@click.option("--rows", default=1_000_000, show_default=True, help="Synthetic drill results to export.")
+@click.option("--compare/--no-compare", default=False,
+              help="Also measure loading every row with .all() first.")
+def bench_export(rows, compare):
+    """Stream a CSV export from a throwaway SQLite database and report peak memory."""
+    import tempfile
+    import tracemalloc
+    from datetime import datetime, timedelta
+    from sqlalchemy import create_engine, insert
+    from app import db
+    from app.models import Institute, User, Drill, DrillParticipation
+    from app.services.export import drill_results_query, stream_csv
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{tmp}/export.db")
+        db.metadata.create_all(engine)
+
+        users = max(1, rows // 10)
+        start = datetime(2025, 1, 1)
+        with engine.begin() as conn:
+            conn.execute(insert(Institute), [{"institute_id": 1, "name": "Bench School", "location": "Bench"}])
+            conn.execute(insert(Drill), [
+                {"drill_id": d, "institute_id": 1, "drill_type": "virtual", "hazard_type": "fire",
+                 "title": f"Drill {d}", "scheduled_date": start + timedelta(days=d)}
+                for d in range(1, 11)
+            ])
+            conn.execute(insert(User), [
+                {"id": u, "first_name": "S", "last_name": str(u), "email": f"s{u}@bench.test",
+                 "password_hash": "x", "role": "student", "institute_id": 1}
+                for u in range(1, users + 1)
+            ])
+            batch = []
+            for i in range(rows):
+                batch.append({"user_id": i // 10 + 1, "drill_id": i % 10 + 1, "score": i % 11,
+                              "completed_at": start + timedelta(minutes=i)})
+                if len(batch) == 50_000:
+                    conn.execute(insert(DrillParticipation), batch)
+                    batch = []
+            if batch:
+                conn.execute(insert(DrillParticipation), batch)
+        click.echo(f"Seeded {rows} drill results.")
+
+        def measure(run):
+            tracemalloc.start()
+            result, elapsed = timed(run)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            return result, elapsed, peak
+
+        def streamed():
+            # Peak memory every 10% of the rows; flat if the export streams
+            size, checkpoints, seen = 0, [], 0
+            step = max(1, rows // 10)
+            with engine.connect() as conn:
+                for chunk in stream_csv(drill_results_query(), executor=conn):
+                    size += len(chunk)
+                    seen += chunk.count("\n")
+                    if seen >= step * (len(checkpoints) + 1):
+                        checkpoints.append(tracemalloc.get_traced_memory()[1])
+            return size, checkpoints
+
+        (size, checkpoints), elapsed, peak = measure(streamed)
+        click.echo(f"  streaming  {elapsed:7.1f} s  {size / 1024 / 1024:8.1f} MB CSV  "
+                   f"peak {peak / 1024 / 1024:6.1f} MB")
+        click.echo("  peak by progress: " + " ".join(f"{p / 1024 / 1024:.1f}" for p in checkpoints))
+
+        if compare:
+            def load_all():
+                with engine.connect() as conn:
+                    return len(conn.execute(drill_results_query()).all())
+
+            count, elapsed, peak = measure(load_all)
+            click.echo(f"  .all()     {elapsed:7.1f} s  {count} rows  peak {peak / 1024 / 1024:6.1f} MB")
+        engine.dispose()
+
+
+# ---------- Load test ----------
+LOAD_SCENARIOS = ("login", "drills_get", "drills_post", "chat", "summarize_pdf")
+LOAD_PASSWORD = "Bench#Load1"
+# Status a successful request answers with, where it is not 200
+EXPECTED_STATUS = {"login": 302}
+HAZARDS = ("earthquake", "flood", "fire", "cyclone", "pandemic")
+
+
+class FakeGemini:
+    """Stands in for the Gemini model: answers after ``latency`` seconds, streaming or not."""
+
+    def __init__(self, latency):
+        self.latency = latency
+
+    def start_chat(self, history):
+        return self
+
+    def send_message(self, message, stream=False):
+        from types import SimpleNamespace
+
+        time.sleep(self.latency)
+        answer = SimpleNamespace(text=f"Stay calm and follow your evacuation plan. ({message[:40]})")
+        return [answer] if stream else answer
+
+
+class FakeGroq:
+    """Stands in for the Groq client's chat completions (the summariser's only use of it)."""
+
+    def __init__(self, latency):
+        from types import SimpleNamespace
+
+        self.latency = latency
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, messages, max_tokens, **kwargs):
+        from types import SimpleNamespace
+
+        time.sleep(self.latency)
+        content = messages[-1]["content"][-max_tokens:]
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+def seed_load_data(engine, institutes, students, drills, questions, participations):
+    """Bulk-insert synthetic institutes, students, drills, questions and participations.
+
+    Counts other than ``institutes`` are per institute (``participations``
+    per student). Every fourth drill is physical; virtual drills get
+    ``questions`` four-option questions whose first option is correct.
+    Returns ``{institute_id: {"students": [email, ...], "drills": {drill_id: {question_id: correct option_id}}}}``.
+    """
+    from datetime import datetime, timedelta
+    from sqlalchemy import insert, text
+    from werkzeug.security import generate_password_hash
+    from app.models import Badge, Drill, DrillParticipation, Institute, Option, Question, Student, User
+
+    password_hash = generate_password_hash(LOAD_PASSWORD)
+    start = datetime(2025, 1, 1)
+    rows = {model: [] for model in (Institute, User, Student, Drill, Question, Option, DrillParticipation)}
+    layout = {}
+    user_id = drill_id = question_id = option_id = 0
+
+    for institute_id in range(1, institutes + 1):
+        rows[Institute].append({"institute_id": institute_id, "name": f"Bench School {institute_id}",
+                                "location": f"Region {institute_id % 4 + 1}"})
+        school = layout[institute_id] = {"students": [], "drills": {}}
+        virtual = []
+        for d in range(drills):
+            drill_id += 1
+            drill_type = "physical" if d % 4 == 3 else "virtual"
+            rows[Drill].append({"drill_id": drill_id, "institute_id": institute_id, "drill_type": drill_type,
+                                "hazard_type": HAZARDS[d % len(HAZARDS)], "title": f"Drill {drill_id}",
+                                "scheduled_date": start + timedelta(days=d)})
+            if drill_type == "physical":
+                continue
+            virtual.append(drill_id)
+            answer_key = school["drills"][drill_id] = {}
+            for _ in range(questions):
+                question_id += 1
+                rows[Question].append({"question_id": question_id, "drill_id": drill_id,
+                                       "question_text": f"Question {question_id}?"})
+                for o in range(4):
+                    option_id += 1
+                    rows[Option].append({"option_id": option_id, "question_id": question_id,
+                                         "option_text": f"Option {o}", "is_correct": o == 0})
+                answer_key[question_id] = option_id - 3
+
+        for s in range(students):
+            user_id += 1
+            email = f"student{user_id}@bench.example.org"
+            school["students"].append(email)
+            rows[User].append({"id": user_id, "first_name": "Bench", "last_name": f"Student {user_id}",
+                               "email": email, "password_hash": password_hash, "role": "student",
+                               "institute_id": institute_id})
+            rows[Student].append({"user_id": user_id, "student_class": "10", "roll_no": str(s + 1)})
+            for p in range(min(participations, len(virtual))):
+                rows[DrillParticipation].append({"drill_id": virtual[(s + p) % len(virtual)], "user_id": user_id,
+                                                 "score": (s + p) % (questions + 1),
+                                                 "completed_at": start + timedelta(days=p, minutes=s)})
+
+    with engine.begin() as conn:
+        conn.execute(insert(Badge), [{"name": "Gold"}, {"name": "Silver"}])
+        for model, batch in rows.items():
+            for offset in range(0, len(batch), 5000):
+                conn.execute(insert(model), batch[offset:offset + 5000])
+        if conn.dialect.name == "postgresql":
+            # Explicit ids do not advance the serial sequences
+            for table, column in (("institutes", "institute_id"), ("users", "id"), ("drills", "drill_id"),
+                                  ("questions", "question_id"), ("options", "option_id")):
+                conn.execute(text(f"SELECT setval(pg_get_serial_sequence('{table}', '{column}'), "
+                                  f"(SELECT MAX({column}) FROM {table}))"))
+    return layout
+
+
+def _bench_app(database_url, workdir):
+    """A second app on the benchmark database, with job queue and caches under ``workdir``."""
+    from app import create_app
+    from config import get_config
+
+    settings = {
+        "SQLALCHEMY_DATABASE_URI": database_url,
+        "SQLALCHEMY_REPLICA_URI": None,
+        "JOB_QUEUE_PATH": os.path.join(workdir, "jobs.sqlite3"),
+        "CONTENT_CACHE_PATH": os.path.join(workdir, "content_cache.sqlite3"),
+        "JOB_WORKERS": 0,
+        "WTF_CSRF_ENABLED": False,
+        # Every bench client would otherwise share one institute's bucket
+        "RATE_LIMIT_ENABLED": False,
+    }
+    return create_app(type("BenchConfig", (get_config(),), settings))
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class LoadRun:
+    """Drives one scenario from ``concurrency`` threads, each with its own test client."""
+
+    def __init__(self, app, layout, query_counter, seed=0):
+        self.app = app
+        self.layout = layout
+        self.queries = query_counter
+        self.seed = seed
+
+    def login(self, client, email):
+        return client.post("/auth/login", data={"email": email, "password": LOAD_PASSWORD, "role": "student"})
+
+    def run(self, scenario, total, concurrency):
+        import random
+        import threading
+
+        emails = [(institute_id, email) for institute_id, school in self.layout.items()
+                  for email in school["students"]]
+        remaining = iter(range(total))
+        lock = threading.Lock()
+        samples = []
+
+        def worker(number):
+            rng = random.Random(self.seed * 1000 + number)
+            institute_id, email = emails[number % len(emails)]
+            client = self.app.test_client()
+            if scenario != "login" and self.login(client, email).status_code != 302:
+                raise RuntimeError(f"Bench student {email} could not log in")
+            request = getattr(self, f"_{scenario}")
+            while True:
+                with lock:
+                    i = next(remaining, None)
+                if i is None:
+                    return
+                if scenario == "login":
+                    # A fresh client each time; a logged-in one is just redirected
+                    client = self.app.test_client()
+                    institute_id, email = emails[rng.randrange(len(emails))]
+                self.queries.reset()
+                start = time.perf_counter()
+                response = request(client, institute_id, email, rng, i)
+                elapsed = time.perf_counter() - start
+                ok = (response.status_code == EXPECTED_STATUS.get(scenario, 200)
+                      and not (response.is_json and response.get_json().get("error")))
+                with lock:
+                    samples.append((elapsed, self.queries.count, ok))
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(concurrency)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall = time.perf_counter() - start
+
+        latencies = sorted(s[0] for s in samples)
+        return {
+            "requests": len(samples),
+            "errors": sum(not s[2] for s in samples),
+            "throughput": round(len(samples) / wall, 2) if wall else 0.0,
+            "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+            "queries_per_request": round(sum(s[1] for s in samples) / len(samples), 2) if samples else 0.0,
+        }
+
+    # One request per scenario
+    def _login(self, client, institute_id, email, rng, i):
+        return self.login(client, email)
+
+    def _drills_get(self, client, institute_id, email, rng, i):
+        return client.get("/student/drills")
+
+    def _drills_post(self, client, institute_id, email, rng, i):
+        drills = self.layout[institute_id]["drills"]
+        drill_id = rng.choice(sorted(drills))
+        form = {"drill_id": drill_id}
+        for question_id, correct in drills[drill_id].items():
+            form[f"question_{question_id}"] = correct if rng.random() < 0.8 else correct + 1
+        return client.post("/student/drills", data=form)
+
+    def _chat(self, client, institute_id, email, rng, i):
+        hazard = rng.choice(HAZARDS)
+        return client.post("/chat", json={"message": f"What should I do during a {hazard}? ({i})"})
+
+    def _summarize_pdf(self, client, institute_id, email, rng, i):
+        # A different document each time, so extraction and summary are never cached
+        pdf = make_synthetic_pdf(2, words_per_page=200, title=f"Bench handout {self.seed}-{i}")
+        return client.post("/student/summarize_pdf", data={"pdf_file": (io.BytesIO(pdf), f"handout{i}.pdf")},
+                           content_type="multipart/form-data")
+
+
+class QueryCounter:
+    """SQL statements executed on the calling thread since the last reset()."""
+
+    def __init__(self, engine):
+        import threading
+        from sqlalchemy import event
+
+        self._local = threading.local()
+        event.listen(engine, "before_cursor_execute", self._count)
+
+    def _count(self, *args):
+        self._local.count = self.count + 1
+
+    @property
+    def count(self):
+        return getattr(self._local, "count", 0)
+
+    def reset(self):
+        self._local.count = 0
+
+
+def compare_to_baseline(results, baseline, tolerance):
+    """Print the change against ``baseline``; returns the scenarios that regressed."""
+    regressions = []
+    for name, current in results.items():
+        before = baseline.get("scenarios", {}).get(name)
+        if before is None:
+            continue
+        changes = []
+        for metric in ("p50_ms", "p95_ms", "throughput", "queries_per_request"):
+            if before[metric]:
+                changes.append(f"{metric} {(current[metric] - before[metric]) / before[metric] * 100:+.0f}%")
+        slower = before["p95_ms"] and current["p95_ms"] > before["p95_ms"] * (1 + tolerance)
+        # Query counts are deterministic; any real increase is an N+1 or a lost cache
+        more_queries = current["queries_per_request"] > before["queries_per_request"] + 0.5
+        flag = "REGRESSED" if slower or more_queries else "ok"
+        click.echo(f"  {name:<14} {flag:<10} " + "  ".join(changes))
+        if flag != "ok":
+            regressions.append(name)
+    return regressions
+
+
+@bench_cli.command("load")
+@click.option("--database-url", default=None,
+              help="Empty database to seed (SQLite or Postgres); a temporary SQLite file by default.")
+@click.option("--institutes", default=5, show_default=True)
+@click.option("--students", default=50, show_default=True, help="Students per institute.")
+@click.option("--drills", default=12, show_default=True, help="Drills per institute.")
+@click.option("--questions", default=10, show_default=True, help="Questions per virtual drill.")
+@click.option("--participations", default=4, show_default=True, help="Completed drills per student.")
+@click.option("--scenario", "scenarios", multiple=True, type=click.Choice(LOAD_SCENARIOS),
+              help="Scenario to run (repeatable); all by default.")
+@click.option("--requests", "total", default=200, show_default=True, help="Requests per scenario.")
+@click.option("--concurrency", default=4, show_default=True, help="Client threads per scenario.")
+@click.option("--latency", default=0.05, show_default=True, help="Simulated seconds per Gemini/Groq call.")
+@click.option("--save", "save_path", type=click.Path(dir_okay=False), help="Write the results as a baseline.")
+@click.option("--baseline", "baseline_path", type=click.Path(exists=True, dir_okay=False),
+              help="Compare against a saved baseline; exits 1 on a regression.")
+@click.option("--tolerance", default=0.2, show_default=True, help="Allowed p95 slowdown against the baseline.")
+def bench_load(database_url, institutes, students, drills, questions, participations, scenarios,
+               total, concurrency, latency, save_path, baseline_path, tolerance):
+    """Seed a benchmark database and load-test the hot endpoints with fake AI clients.
+
+    Requests go through the Flask test client, so the numbers cover the
+    app, ORM and database but not a WSGI server; a live gunicorn reports
+    the same per-endpoint figures on /metrics.
+    """
+    import json
+    import platform
+    import tempfile
+    from sqlalchemy import func, select
+    from app import db, schema
+    from app.models import User
+    from app.services.providers import providers
+
+    scenarios = scenarios or LOAD_SCENARIOS
+    with tempfile.TemporaryDirectory() as workdir:
+        app = _bench_app(database_url or f"sqlite:///{workdir}/load.db", workdir)
+        with app.app_context():
+            schema.upgrade()
+            engine = db.engine
+            if db.session.execute(select(func.count(User.id))).scalar():
+                raise click.UsageError("The benchmark database must be empty; it is seeded from scratch.")
+            db.session.remove()
+
+            layout, elapsed = timed(seed_load_data, engine, institutes, students, drills, questions, participations)
+            click.echo(f"Seeded {institutes} institutes x {students} students, {drills} drills "
+                       f"on {engine.dialect.name} in {elapsed:.1f}s")
+            counter = QueryCounter(engine)
+
+        providers.override("gemini", FakeGemini(latency))
+        providers.override("groq", FakeGroq(latency))
+        try:
+            run = LoadRun(app, layout, counter)
+            results = {}
+            click.echo(f"{'scenario':<14} {'requests':>8} {'errors':>6} {'req/s':>8} "
+                       f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'queries':>8}")
+            for scenario in scenarios:
+                r = results[scenario] = run.run(scenario, total, concurrency)
+                click.echo(f"{scenario:<14} {r['requests']:>8} {r['errors']:>6} {r['throughput']:>8.1f} "
+                           f"{r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} {r['p99_ms']:>8.1f} "
+                           f"{r['queries_per_request']:>8.1f}")
+        finally:
+            providers.reset("gemini")
+            providers.reset("groq")
+            with app.app_context():
+                db.engine.dispose()
+
+    report = {
+        "meta": {
+            "database": engine.dialect.name,
+            "institutes": institutes, "students": students, "drills": drills,
+            "questions": questions, "participations": participations,
+            "requests": total, "concurrency": concurrency, "latency": latency,
+            "python": platform.python_version(),
+        },
+        "scenarios": results,
+    }
+    if save_path:
+        with open(save_path, "w") as f:
+            json.dump(report, f, indent=2)
+        click.echo(f"Baseline saved to {save_path}")
+    if baseline_path:
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+        if baseline.get("meta", {}) != {**report["meta"], "python": baseline.get("meta", {}).get("python")}:
+            click.echo("Note: the baseline was recorded with different parameters.")
+        click.echo(f"Against {baseline_path}:")
+        if compare_to_baseline(results, baseline, tolerance):
+            raise SystemExit(1)
@@ -0,0 +1,162 @@
+# app/commands.py
+import csv
+import json
+import click
+from flask.cli import AppGroup
+
+faq_cli = AppGroup("faq", help="Manage the chatbot FAQ answer cache.")
+
+
+@faq_cli.command("seed")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--lang", default="en", show_default=True, help="Language of the entries.")
+def faq_seed(path, lang):
+    """Pre-seed the FAQ cache from a JSON or CSV file of question/answer pairs.
+
+    JSON files hold a list of {"question": ..., "answer": ...} objects;
+    CSV files need "question" and "answer" columns.
+    """
+    from app.services.faq_cache import faq_cache
+
+    if faq_cache.language(lang) is None:
+        raise click.BadParameter(f"expected one of {', '.join(faq_cache.languages)}", param_hint="--lang")
+    with open(path, encoding="utf-8") as f:
+        if path.lower().endswith(".json"):
+            rows = json.load(f)
+        else:
+            rows = list(csv.DictReader(f))
+
+    pairs = [(row["question"], row["answer"]) for row in rows
+             if row.get("question") and row.get("answer")]
+    count = faq_cache.seed(pairs, lang)
+    click.echo(f"Seeded {count} FAQ entries ({lang}).")
+
+
+@faq_cli.command("stats")
+def faq_stats():
+    """Show stored FAQ entries by language and source.
+
+    Hit rates are counted by the web workers; they are on /metrics as
+    faq_cache_lookups_total.
+    """
+    from sqlalchemy import func
+    from app import db
+    from app.models import FAQEntry
+
+    rows = (
+        db.session.query(FAQEntry.lang, FAQEntry.source, func.count())
+        .group_by(FAQEntry.lang, FAQEntry.source)
+        .order_by(FAQEntry.lang, FAQEntry.source)
+        .all()
+    )
+    for lang, source, count in rows:
+        click.echo(f"{lang} {source}: {count}")
+    click.echo("Hit rates: see faq_cache_lookups_total on /metrics.")
+
+
+@faq_cli.command("pending")
+@click.option("--limit", default=50, show_default=True)
+def faq_pending(limit):
+    """List chatbot answers learned from chat that are awaiting review."""
+    from app.services.faq_cache import faq_cache
+
+    for entry in faq_cache.pending(limit):
+        click.echo(f"[{entry.faq_id}] ({entry.lang}) {entry.question}")
+        click.echo(f"    {entry.answer[:200]}")
+
+
+@faq_cli.command("approve")
+@click.argument("faq_ids", nargs=-1, type=int, required=True)
+def faq_approve(faq_ids):
+    """Mark reviewed answers so similar questions may be served from them."""
+    from app.services.faq_cache import faq_cache
+
+    count = faq_cache.approve(faq_ids)
+    click.echo(f"Approved {count} FAQ entries.")
+
+
+@faq_cli.command("clear")
+@click.option("--all", "include_seeded", is_flag=True, help="Also remove seeded entries.")
+def faq_clear(include_seeded):
+    """Remove cached chatbot answers."""
+    from app.services.faq_cache import faq_cache
+
+    faq_cache.clear(include_seeded)
+    click.echo("FAQ cache cleared.")
+
+
+schema_cli = AppGroup("schema", help="Create and migrate the database schema.")
+
+
+@schema_cli.command("upgrade")
+def schema_upgrade():
+    """Create missing tables and apply pending migrations."""
+    from app import schema
+
+    applied = schema.upgrade()
+    if applied:
+        click.echo(f"Applied schema versions: {', '.join(map(str, applied))}")
+    else:
+        click.echo(f"Schema already at version {schema.LATEST_VERSION}.")
+
+
+@schema_cli.command("version")
+def schema_version():
+    """Show the database and code schema versions."""
+    from app import db, schema
+
+    with db.engine.connect() as conn:
+        version = schema.current_version(conn)
+    click.echo(f"database: {version}  code: {schema.LATEST_VERSION}")
+
+
+progress_cli = AppGroup("progress", help="Maintain the per-student progress totals.")
+
+
+@progress_cli.command("rebuild")
+@click.option("--user-id", type=int, default=None, help="Only rebuild this student's rows.")
+def progress_rebuild(user_id):
+    """Recompute student progress from quiz attempts and drill participations."""
+    from app.services import progress
+
+    rows = progress.rebuild(user_id)
+    click.echo(f"Rebuilt {rows} progress rows.")
+
+
+roster_cli = AppGroup("roster", help="Bulk student onboarding.")
+
+
+@roster_cli.command("import")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--institute-id", type=int, required=True, help="Institute the students belong to.")
+@click.option("--report", "report_path", type=click.Path(dir_okay=False),
+              help="Write the per-row report (with generated passwords) to this CSV file.")
+@click.option("--workers", type=int, default=None, help="Processes for password hashing.")
+def roster_import(path, institute_id, report_path, workers):
+    """Create student accounts from a roster CSV.
+
+    Needs first_name, last_name, email, student_class and roll_no columns;
+    phone and password are optional.
+    """
+    from app.services import roster
+    from app.services.reference_cache import get_institute
+
+    if not get_institute(institute_id):
+        raise click.BadParameter(f"Institute {institute_id} does not exist.", param_hint="--institute-id")
+
+    with open(path, encoding="utf-8-sig") as f:
+        try:
+            rows = roster.read_roster(f.read())
+        except roster.RosterError as e:
+            raise click.ClickException(str(e))
+
+    report = roster.import_roster(rows, institute_id, workers or roster.HASH_WORKERS)
+    created = sum(r["status"] == "created" for r in report)
+    click.echo(f"Created {created} of {len(report)} students.")
+    for entry in report:
+        if entry["status"] == "error":
+            click.echo(f"  line {entry['line']}: {entry['email']}: {entry['error']}", err=True)
+    if report_path:
+        with open(report_path, "w", encoding="utf-8", newline="") as f:
+            f.write(roster.report_csv(report))
+        click.echo(f"Report written to {report_path}")
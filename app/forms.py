@@ -5,15 +5,17 @@ import re
 from app.models import User, Institute
 
 # Password validation
+PASSWORD_RULE = "Password must contain an uppercase, lowercase, number, and special character."
+
+def password_is_strong(password):
+    return bool(re.search(r'[A-Z]', password) and
+                re.search(r'[a-z]', password) and
+                re.search(r'\d', password) and
+                re.search(r'[!@#$%^&*(),.?":{}|<>]', password))
+
 def validate_password(form, field):
-    password = field.data
-    if (not re.search(r'[A-Z]', password) or
-        not re.search(r'[a-z]', password) or
-        not re.search(r'\d', password) or
-        not re.search(r'[!@#$%^&*(),.?":{}|<>]', password)):
-        raise ValidationError(
-            "Password must contain an uppercase, lowercase, number, and special character."
-        )
+    if not password_is_strong(field.data):
+        raise ValidationError(PASSWORD_RULE)
 
 # Unique email validation
 def validate_email_unique(form, field):
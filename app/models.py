@@ -27,7 +27,7 @@ class User(UserMixin, db.Model):
      role = db.Column(db.String(20), nullable=False)
      admin_id = db.Column(db.String(20))
      teacher_code = db.Column(db.String(50))
-     institute_id = db.Column(db.Integer, db.ForeignKey("institutes.institute_id"))
+     institute_id = db.Column(db.Integer, db.ForeignKey("institutes.institute_id"), index=True)
      
 class Student(db.Model):
     __tablename__ = "students"
@@ -56,6 +56,12 @@ class Module(db.Model):
     duration = db.Column(db.String(20), nullable=True)
     quality = db.Column(db.String(20), nullable=True)
 
+    __table_args__ = (
+        # Module catalogue: keyset pages, newest first, optionally by type
+        db.Index("ix_modules_created_id", "created_at", "module_id"),
+        db.Index("ix_modules_type_created_id", "module_type", "created_at", "module_id"),
+    )
+
 class Drill(db.Model):
     __tablename__ = "drills"
     drill_id = db.Column(db.Integer, primary_key=True)
@@ -83,6 +89,14 @@ class Drill(db.Model):
     )
     scheduled_date = db.Column(db.DateTime, nullable=True)
 
+    # Questions for virtual drills; use selectinload() when listing drills
+    questions = db.relationship("Question", backref="drill", lazy=True)
+
+    __table_args__ = (
+        # Drills page: an institute's drills ordered by date
+        db.Index("ix_drills_institute_scheduled", "institute_id", "scheduled_date"),
+    )
+
 class Badge(db.Model):
     __tablename__ = "badges"
     badge_id = db.Column(db.Integer, primary_key=True)
@@ -108,7 +122,7 @@ class DrillParticipation(db.Model):
 class Question(db.Model):
     __tablename__ = "questions"
     question_id = db.Column(db.Integer, primary_key=True)
-    drill_id = db.Column(db.Integer, db.ForeignKey("drills.drill_id"), nullable=True)  # For virtual drills
+    drill_id = db.Column(db.Integer, db.ForeignKey("drills.drill_id"), nullable=True, index=True)  # For virtual drills
     hazard_type = db.Column(  
         db.Enum("earthquake", "flood", "fire", "cyclone", "pandemic", name="question_hazard_enum"),
         nullable=True
@@ -125,7 +139,7 @@ class Question(db.Model):
 class Option(db.Model):
     __tablename__ = "options"
     option_id = db.Column(db.Integer, primary_key=True)
-    question_id = db.Column(db.Integer, db.ForeignKey("questions.question_id"))
+    question_id = db.Column(db.Integer, db.ForeignKey("questions.question_id"), index=True)
     option_text = db.Column(db.Text, nullable=False)
     is_correct = db.Column(db.Boolean, default=False)
     feedback = db.Column(db.Text, nullable=True)  # optional feedback for choice
@@ -143,4 +157,66 @@ class QuizAttempt(db.Model):
     selected_option_id = db.Column(db.Integer, db.ForeignKey("options.option_id"))
     score = db.Column(db.Integer, default=0)
     attempted_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Set by the browser quizzes, which score a whole attempt client-side
+    client_attempt_id = db.Column(db.String(64))
+    total_questions = db.Column(db.Integer)
+
+    __table_args__ = (
+        # Per-student history and progress by hazard
+        db.Index("ix_quiz_attempts_user_hazard_attempted", "user_id", "hazard_type", "attempted_at"),
+        db.Index("ix_quiz_attempts_drill", "drill_id"),
+        # Retried uploads of the same attempt are ignored; ids are per student
+        db.Index("uq_quiz_attempts_user_client_attempt", "user_id", "client_attempt_id", unique=True),
+    )
     
+
+class ChatMessage(db.Model):
+    __tablename__ = "chat_messages"
+    message_id = db.Column(db.Integer, primary_key=True)
+    conversation_id = db.Column(db.String(32), nullable=False)
+    role = db.Column(db.String(20), nullable=False)  # "user" or "assistant"
+    content = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        # History windows read the newest messages of one conversation
+        db.Index("ix_chat_messages_conversation", "conversation_id", "message_id"),
+    )
+
+class FAQEntry(db.Model):
+    __tablename__ = "faq_entries"
+    faq_id = db.Column(db.Integer, primary_key=True)
+    lang = db.Column(db.String(10), nullable=False, default="en")
+    question = db.Column(db.Text, nullable=False)
+    normalized_question = db.Column(db.Text, nullable=False)
+    answer = db.Column(db.Text, nullable=False)
+    source = db.Column(db.String(20), nullable=False, default="chat")  # "seed", "reviewed" or "chat"
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint("lang", "normalized_question", name="uq_faq_lang_question"),
+    )
+
+class StudentProgress(db.Model):
+    # Running totals per student and hazard, kept up to date by
+    # app/services/progress.py; `flask progress rebuild` recomputes them
+    __tablename__ = "student_progress"
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), primary_key=True)
+    hazard_type = db.Column(
+        db.Enum("earthquake", "flood", "fire", "cyclone", "pandemic", name="progress_hazard_enum"),
+        primary_key=True
+    )
+    quiz_attempts = db.Column(db.Integer, nullable=False, default=0)
+    quiz_best_percent = db.Column(db.Integer, nullable=True)
+    quiz_score_total = db.Column(db.Integer, nullable=False, default=0)
+    quiz_question_total = db.Column(db.Integer, nullable=False, default=0)
+    drills_completed = db.Column(db.Integer, nullable=False, default=0)
+    drill_score_total = db.Column(db.Integer, nullable=False, default=0)
+    badges = db.Column(db.Integer, nullable=False, default=0)
+    last_attempted_at = db.Column(db.DateTime, nullable=True)
+
+class SchemaVersion(db.Model):
+    __tablename__ = "schema_version"
+    version = db.Column(db.Integer, primary_key=True)
+    description = db.Column(db.String(200))
+    applied_at = db.Column(db.DateTime, default=datetime.utcnow)
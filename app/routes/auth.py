@@ -3,7 +3,11 @@ from flask_login import login_user, logout_user, login_required, current_user
 from app import db
 from app.models import User, Institute, Student
 from app.forms import RegisterForm, LoginForm
+from app.services.reference_cache import get_institute
 from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
+from app.services.identity import forget_user
 bp = Blueprint('auth', __name__)
 
 @bp.route('/login', methods=['GET', 'POST'])
@@ -19,18 +23,19 @@ def login():
         password = form.password.data
         role = form.role.data
 
-        user = User.query.filter_by(email=email).first()
+        # The student's institute comes back with the user in one joined query
+        user = User.query.options(joinedload(User.institute)).filter_by(email=email).first()
         
         if user and check_password_hash(user.password_hash, password) and user.role == role:
             # Student: validate institute
             if user.role == 'student' and user.institute_id:
-                institute = Institute.query.get(user.institute_id)
+                institute = user.institute
                 if not institute:
                     flash('Your registered institute does not exist. Contact admin.', 'error')
                     return redirect(url_for('auth.login'))
                 
             if user.role == 'teacher' and user.teacher_code:
-                institute = Institute.query.get(user.teacher_code)  
+                institute = get_institute(user.teacher_code)
                 if not institute:
                     flash('Invalid teacher code. Contact admin.', 'error')
                     return redirect(url_for('auth.login'))
@@ -89,7 +94,7 @@ def register():
                 flash('Invalid Institute ID', 'error')
                 return render_template('auth/register.html', form=form)
             
-            institute = Institute.query.get(institute_id)
+            institute = get_institute(institute_id)
             if not institute:
                 flash('Selected institute does not exist. Please choose a valid one.', 'error')
                 return render_template('auth/register.html', form=form)
@@ -97,7 +102,7 @@ def register():
         elif role == 'teacher':
             teacher_code = form.teacher_code.data
             # Validate teacher code exists as an institute_id
-            institute = Institute.query.get(teacher_code)
+            institute = get_institute(teacher_code)
             if not institute:
                 flash('Invalid teacher code. Please use a valid institute ID.', 'error')
                 return render_template('auth/register.html', form=form)
@@ -105,11 +110,6 @@ def register():
         elif role == 'admin':
             admin_id = form.admin_id.data
         
-        # Check if user already exists
-        if User.query.filter_by(email=email).first():
-            flash('Email already registered', 'error')
-            return render_template('auth/register.html', form=form)
-        
         # Create new user
         user = User(
             first_name=first_name,
@@ -122,19 +122,23 @@ def register():
             teacher_code=teacher_code,
             password_hash=hashed_password
         )
-        
         db.session.add(user)
-        db.session.commit()
 
-        # If student, add entry to students table
-        if form.role.data == 'student':
-            student = Student(
-                user_id=user.id, 
-                student_class=form.student_class.data,
-                roll_no=form.roll_no.data
-            )
-            db.session.add(student)
+        try:
+            # If student, add entry to students table in the same transaction
+            if form.role.data == 'student':
+                db.session.flush()
+                db.session.add(Student(
+                    user_id=user.id, 
+                    student_class=form.student_class.data,
+                    roll_no=form.roll_no.data
+                ))
             db.session.commit()
+        except IntegrityError:
+            # The form already checked the email; this is a concurrent sign-up
+            db.session.rollback()
+            flash('Email already registered', 'error')
+            return render_template('auth/register.html', form=form)
         
         flash('Registration successful! Please login.', 'success')
         return redirect(url_for('auth.login'))
@@ -144,6 +148,7 @@ def register():
 @bp.route('/logout')
 @login_required
 def logout():
+    forget_user(current_user.id)
     logout_user()
     flash('You have been logged out.', 'info')
     return redirect(url_for('main.home'))
\ No newline at end of file
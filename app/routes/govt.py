@@ -1,12 +1,59 @@
 # app/routes/govt.py
-from flask import Blueprint, render_template, redirect, url_for
+from flask import Blueprint, render_template, redirect, url_for, request, Response, stream_with_context, abort, jsonify
 from flask_login import login_required, current_user
+from app.services.db_routing import use_replica
+from app.services.analytics import AnalyticsError, region_analytics, regions_overview
+from app.services.export import DATASETS, HAZARD_TYPES, ExportError, parse_filters, stream_csv, export_filename
+from app.services import throttle
 
 bp = Blueprint('govt', __name__)
 
 @bp.route('/dashboard')
 @login_required
+@use_replica
 def dashboard():
     if current_user.role != 'admin':
         return redirect(url_for('main.home'))
-    return render_template('govt/dashboard.html')
\ No newline at end of file
+    # Nationwide numbers unless a region (institute location) is picked
+    region = request.args.get('region') or None
+    try:
+        stats = region_analytics(region)
+    except AnalyticsError as e:
+        abort(404, description=str(e))
+    return render_template(
+        'govt/dashboard.html',
+        regions=regions_overview(),
+        region=region,
+        stats=stats,
+        hazard_types=HAZARD_TYPES
+    )
+
+@bp.route('/export')
+@login_required
+@use_replica
+def export():
+    if current_user.role != 'admin':
+        abort(403)
+    dataset = request.args.get('dataset', 'drills')
+    if dataset not in DATASETS:
+        abort(404)
+    try:
+        filters = parse_filters(request.args)
+    except ExportError as e:
+        abort(400, description=str(e))
+
+    # Streamed straight from the database cursor; never held in memory
+    rows = stream_csv(DATASETS[dataset](**filters))
+    return Response(
+        stream_with_context(rows),
+        mimetype='text/csv',
+        headers={'Content-Disposition': f'attachment; filename="{export_filename(dataset, filters)}"'}
+    )
+
+@bp.route('/queues')
+@login_required
+def queues():
+    # Rate limiter, request coalescing and summary job queue figures
+    if current_user.role != 'admin':
+        abort(403)
+    return jsonify(throttle.stats())
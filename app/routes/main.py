@@ -1,16 +1,20 @@
 # app/routes/main.py
-from flask import Blueprint, render_template, request, jsonify, session
+from flask import Blueprint, render_template, request, jsonify, session, current_app, Response, stream_with_context
 from flask_wtf.csrf import CSRFProtect, CSRFError
-import google.generativeai as genai
 import json, os
 from dotenv import load_dotenv
+from app.services.chat_store import get_chat_store
+from app.services.faq_cache import faq_cache, normalize
+from app.services.providers import providers
+from app.services.throttle import rate_limited, single_flight
+from app.services.metrics import external_call
+from app.services.http_cache import conditional
+import logging
 
 load_dotenv()
 
 bp = Blueprint('main', __name__)
-
-# Configure Gemini API key
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+logger = logging.getLogger(__name__)
 
 # Create the model with system instruction
 generation_config = {
@@ -52,39 +56,69 @@ system_instruction = (
     "Focus only on disaster safety, awareness, and management."
 )
 
-model = genai.GenerativeModel(
-    model_name="gemini-2.5-pro",
-    generation_config=generation_config,
-    system_instruction=system_instruction,
-    safety_settings=safety_settings
-)
+def _gemini_model():
+    # google.generativeai is slow to import; it is only loaded on the first chat
+    import google.generativeai as genai
+
+    # Configure Gemini API key
+    genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+    return genai.GenerativeModel(
+        model_name="gemini-2.5-pro",
+        generation_config=generation_config,
+        system_instruction=system_instruction,
+        safety_settings=safety_settings
+    )
+
+providers.register("gemini", _gemini_model)
 
 @bp.route('/')
+@conditional('index.html')
 def home():
     return render_template('index.html')
 
 @bp.route('/about')
+@conditional('about.html')
 def about():
     return render_template('about.html')
 
 @bp.route('/dos-donts')
+@conditional('dos_and_donts.html')
 def dos_donts():
     return render_template('dos_and_donts.html')
 
 @bp.route('/emergency-contacts')
+@conditional('emergency_contacts.html')
 def emergency_contacts():
     return render_template('emergency_contacts.html')
 
 # Serve chatbot page
 @bp.route('/chatbot')
 def chatbot():
-    # Clear any existing chat history when visiting the dedicated chatbot page
-    if "chat_history" in session:
-        session.pop("chat_history")
+    # Start a fresh conversation when visiting the dedicated chatbot page
+    session.pop("conversation_id", None)
     return render_template("chatbot.html")
 
+def _open_chat():
+    """Return the chat store, conversation id and Gemini-format history."""
+    # History lives in the chat store; the session only carries its id,
+    # so it is written once per conversation rather than every turn
+    store = get_chat_store()
+    conversation_id = session.get("conversation_id")
+    if not conversation_id:
+        conversation_id = store.new_conversation()
+        session["conversation_id"] = conversation_id
+
+    # Initialize chat with the newest messages that fit the token budget
+    history = [
+        {"role": "user", "parts": [msg["content"]]} if msg["role"] == "user" 
+        else {"role": "model", "parts": [msg["content"]]} 
+        for msg in store.history(conversation_id, current_app.config["CHAT_HISTORY_TOKENS"])
+    ]
+    return store, conversation_id, history
+
 # Chat API endpoint for frontend
 @bp.route('/chat', methods=['POST'])
+@rate_limited("chat")
 def chat():
     try:
         data = request.get_json()
@@ -94,34 +128,89 @@ def chat():
         if not user_message:
             return jsonify({"response": "I didn't catch that. Could you rephrase?"})
 
-        # Ensure session history is valid
-        if "chat_history" not in session:
-            session["chat_history"] = []
-
-        # Initialize chat with history
-        history = [
-            {"role": "user", "parts": [msg["content"]]} if msg["role"] == "user" 
-            else {"role": "model", "parts": [msg["content"]]} 
-            for msg in session["chat_history"]
-        ]
-        chat_session = model.start_chat(history=history)
-
-        # Send message to Gemini
-        response = chat_session.send_message(user_message)
-        bot_response = response.text
-
-        # Save conversation history (limit to last 10 exchanges to prevent session bloat)
-        session["chat_history"].append({"role": "user", "content": user_message})
-        session["chat_history"].append({"role": "assistant", "content": bot_response})
-        
-        # Keep only the last 10 exchanges (20 messages)
-        if len(session["chat_history"]) > 20:
-            session["chat_history"] = session["chat_history"][-20:]
-            
-        session.modified = True
+        store, conversation_id, history = _open_chat()
+
+        # First-turn questions can be answered from the FAQ cache
+        bot_response = faq_cache.lookup(user_message, lang) if not history else None
+
+        if bot_response is None and not history:
+            # The same opening question asked concurrently goes to Gemini once
+            def ask():
+                with external_call("gemini"):
+                    answer = providers.get("gemini").start_chat(history=[]).send_message(user_message).text
+                faq_cache.store(user_message, lang, answer)
+                return answer
+            bot_response = single_flight.do(("chat", lang, normalize(user_message)), ask)
+        elif bot_response is None:
+            # Send message to Gemini
+            chat_session = providers.get("gemini").start_chat(history=history)
+            with external_call("gemini"):
+                response = chat_session.send_message(user_message)
+            bot_response = response.text
+
+        # Append this exchange to the conversation
+        store.append(conversation_id, [("user", user_message), ("assistant", bot_response)])
 
         return jsonify({"response": bot_response})
         
     except Exception as e:
-        print(f"Error in chat endpoint: {str(e)}")
+        logger.exception(f"Error in chat endpoint: {e}")
         return jsonify({"response": "I'm experiencing technical difficulties. Please try again shortly."})
+
+def sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+# Streaming variant of /chat: tokens are sent as Server-Sent Events as
+# Gemini generates them ("token" events, then "done" or "error")
+@bp.route('/chat/stream', methods=['POST'])
+@rate_limited("chat")
+def chat_stream():
+    data = request.get_json(silent=True) or {}
+    user_message = data.get("message", "").strip()
+    lang = data.get("lang", "en")
+
+    if not user_message:
+        return Response(sse("done", {"response": "I didn't catch that. Could you rephrase?"}),
+                        mimetype="text/event-stream")
+
+    try:
+        store, conversation_id, history = _open_chat()
+        cached = faq_cache.lookup(user_message, lang) if not history else None
+    except Exception as e:
+        logger.exception(f"Error in chat stream endpoint: {e}")
+        return Response(sse("error", {"response": "I'm experiencing technical difficulties. Please try again shortly."}),
+                        mimetype="text/event-stream")
+
+    def generate():
+        if cached is not None:
+            store.append(conversation_id, [("user", user_message), ("assistant", cached)])
+            yield sse("token", {"text": cached})
+            yield sse("done", {"response": cached})
+            return
+
+        parts = []
+        try:
+            chat_session = providers.get("gemini").start_chat(history=history)
+            with external_call("gemini"):
+                for chunk in chat_session.send_message(user_message, stream=True):
+                    text = chunk.text
+                    if text:
+                        parts.append(text)
+                        yield sse("token", {"text": text})
+        except Exception as e:
+            logger.exception(f"Error in chat stream endpoint: {e}")
+            yield sse("error", {"response": "I'm experiencing technical difficulties. Please try again shortly."})
+            return
+
+        # Only a completed answer is saved to the conversation
+        bot_response = "".join(parts)
+        store.append(conversation_id, [("user", user_message), ("assistant", bot_response)])
+        if not history:
+            faq_cache.store(user_message, lang, bot_response)
+        yield sse("done", {"response": bot_response})
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
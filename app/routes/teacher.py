@@ -1,12 +1,122 @@
 # app/routes/teacher.py
-from flask import Blueprint, render_template, redirect, url_for
+from flask import Blueprint, render_template, redirect, url_for, request, flash, Response, jsonify, abort
 from flask_login import login_required, current_user
+from app.services.db_routing import use_replica
+from app.services.reference_cache import get_institute
+from app.services.analytics import institute_analytics
+from app.services import roster
+from app.services.jobs import job_queue
 
 bp = Blueprint('teacher', __name__)
 
+def _teacher_institute():
+    # Teachers are linked to their institute through the teacher code
+    return get_institute(current_user.teacher_code or current_user.institute_id)
+
 @bp.route('/dashboard')
 @login_required
+@use_replica
 def dashboard():
     if current_user.role != 'teacher':
         return redirect(url_for('main.home'))
-    return render_template('teacher/dashboard.html')
\ No newline at end of file
+    institute = _teacher_institute()
+    stats = institute_analytics(institute.institute_id) if institute else None
+    return render_template('teacher/dashboard.html', institute=institute, stats=stats)
+
+@bp.route('/analytics')
+@login_required
+@use_replica
+def analytics():
+    if current_user.role != 'teacher':
+        return redirect(url_for('main.home'))
+    institute = _teacher_institute()
+    stats = institute_analytics(institute.institute_id) if institute else None
+    return render_template('teacher/analytics.html', institute=institute, stats=stats)
+
+
+@bp.route('/roster', methods=['GET', 'POST'])
+@login_required
+def roster_import():
+    if current_user.role != 'teacher':
+        return redirect(url_for('main.home'))
+    institute = _teacher_institute()
+    if not institute:
+        flash('Your account is not linked to an institute.', 'error')
+        return redirect(url_for('teacher.dashboard'))
+
+    if request.method == 'POST':
+        file = request.files.get('roster')
+        if not file or not file.filename.lower().endswith('.csv'):
+            flash('Please upload a CSV file.', 'error')
+            return _roster_page(institute)
+        try:
+            rows = roster.hash_supplied_passwords(roster.read_roster(file.read().decode('utf-8-sig')))
+        except (UnicodeDecodeError, roster.RosterError) as e:
+            flash(str(e) if isinstance(e, roster.RosterError) else 'The file is not UTF-8 text.', 'error')
+            return _roster_page(institute)
+
+        # Hashing thousands of passwords takes minutes, far past the request
+        # timeout, so the import runs as a background job the page polls
+        job_id = job_queue.enqueue('import_roster', {
+            'institute_id': institute.institute_id,
+            'teacher_id': current_user.id,
+            'rows': rows,
+        }, user_id=current_user.id)
+        return redirect(url_for('teacher.roster_import', job=job_id))
+
+    return _roster_page(institute, job_id=request.args.get('job'))
+
+
+def _roster_page(institute, job_id=None):
+    return render_template('teacher/roster.html', institute=institute, job_id=job_id,
+                           max_supplied_passwords=roster.MAX_SUPPLIED_PASSWORDS)
+
+
+def _roster_job(job_id):
+    # Only teachers of the institute the roster was uploaded for may see it
+    if current_user.role != 'teacher':
+        abort(403)
+    institute = _teacher_institute()
+    job = job_queue.get(job_id)
+    if (job is None or job['kind'] != 'import_roster' or institute is None
+            or job['payload']['institute_id'] != institute.institute_id):
+        abort(404)
+    return job
+
+
+@bp.route('/roster/jobs/<job_id>')
+@login_required
+def roster_job_status(job_id):
+    job = _roster_job(job_id)
+    result = job['result'] or {}
+    return jsonify({
+        'job_id': job_id,
+        'status': job['status'],
+        'stage': job['stage'],
+        'queue_position': job_queue.position(job_id) if job['status'] == 'queued' else None,
+        'rows': result.get('rows'),
+        'created': result.get('created'),
+        'passwords_cleared': result.get('passwords_cleared'),
+        'report_url': url_for('teacher.roster_job_report', job_id=job_id) if job['status'] == 'done' else None,
+        'error': job['error'] if job['status'] == 'failed' else None,
+    })
+
+
+@bp.route('/roster/jobs/<job_id>/report')
+@login_required
+def roster_job_report(job_id):
+    job = _roster_job(job_id)
+    if job['status'] != 'done':
+        abort(404)
+    # The report lists every row's outcome and any generated passwords; the
+    # passwords are handed out once and then removed from the job store
+    result = job['result']
+    body = roster.report_csv(result['report'])
+    if not result['passwords_cleared']:
+        job_queue.update(job_id, result={**result, 'report': roster.without_passwords(result['report']),
+                                         'passwords_cleared': True})
+    return Response(
+        body,
+        mimetype='text/csv',
+        headers={'Content-Disposition': 'attachment; filename="roster-import-report.csv"'}
+    )
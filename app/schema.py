@@ -0,0 +1,164 @@
+# app/schema.py
+import logging
+from datetime import datetime
+from sqlalchemy import Column, Index, MetaData, Table, inspect, select, func
+from app import db
+
+logger = logging.getLogger(__name__)
+
+
+class SchemaError(RuntimeError):
+    pass
+
+
+# ---------- Migrations ----------
+# Each migration takes a connection inside the upgrade transaction and must
+# be safe to run against a database that already has some of its objects.
+def _baseline(conn):
+    # Databases created before versioning used db.create_all() at startup
+    db.metadata.create_all(bind=conn, checkfirst=True)
+
+
+def _create_indexes(conn, *names):
+    wanted = set(names)
+    for table in db.metadata.tables.values():
+        for index in table.indexes:
+            if index.name in wanted:
+                index.create(bind=conn, checkfirst=True)
+                wanted.discard(index.name)
+    if wanted:
+        raise SchemaError(f"Unknown indexes in migration: {', '.join(sorted(wanted))}")
+
+
+def _drop_index(conn, table_name, index_name):
+    """Drop an index no longer declared on the models, if the database has it."""
+    found = {index["name"]: index for index in inspect(conn).get_indexes(table_name)}
+    if index_name not in found:
+        return
+    table = Table(table_name, MetaData(), *(Column(name) for name in found[index_name]["column_names"]))
+    Index(index_name, *table.c).drop(bind=conn)
+
+
+def _analytics_indexes(conn):
+    _create_indexes(
+        conn,
+        "ix_users_institute_id",
+        "ix_drills_institute_scheduled",
+        "ix_questions_drill_id",
+        "ix_options_question_id",
+        "ix_quiz_attempts_user_hazard_attempted",
+        "ix_quiz_attempts_drill",
+    )
+
+
+def _add_columns(conn, table_name, *names):
+    table = db.metadata.tables[table_name]
+    existing = {column["name"] for column in inspect(conn).get_columns(table_name)}
+    for name in names:
+        if name in existing:
+            continue
+        column = table.c[name]
+        column_type = column.type.compile(dialect=conn.dialect)
+        conn.exec_driver_sql(f"ALTER TABLE {table_name} ADD COLUMN {name} {column_type}")
+
+
+def _client_quiz_attempts(conn):
+    # The unique index on the attempt id is created per student by migration 6
+    _add_columns(conn, "quiz_attempts", "client_attempt_id", "total_questions")
+
+
+def _student_progress(conn):
+    from app.services import progress
+
+    db.metadata.tables["student_progress"].create(bind=conn, checkfirst=True)
+    progress.rebuild(bind=conn)
+
+
+def _module_catalogue(conn):
+    # Keyset pages compare created_at; rows without one would never be listed
+    modules = db.metadata.tables["modules"]
+    conn.execute(
+        modules.update().where(modules.c.created_at.is_(None)).values(created_at=datetime.utcnow())
+    )
+    _create_indexes(conn, "ix_modules_created_id", "ix_modules_type_created_id")
+
+
+def _per_student_attempt_ids(conn):
+    # One student's attempt id must not count as another's duplicate
+    _drop_index(conn, "quiz_attempts", "uq_quiz_attempts_client_attempt")
+    _create_indexes(conn, "uq_quiz_attempts_user_client_attempt")
+
+
+MIGRATIONS = [
+    (1, "Baseline schema", _baseline),
+    (2, "Indexes for drills, questions, options, users and quiz attempts", _analytics_indexes),
+    (3, "Client attempt id and question count on quiz attempts", _client_quiz_attempts),
+    (4, "Per-student progress totals, backfilled from attempts and drills", _student_progress),
+    (5, "Module catalogue indexes; backfill missing created_at", _module_catalogue),
+    (6, "Client attempt ids unique per student", _per_student_attempt_ids),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+# ---------- Version stamp ----------
+def _version_table():
+    from app.models import SchemaVersion
+    return SchemaVersion.__table__
+
+
+def current_version(conn):
+    """Highest applied migration, or None when the database has never been stamped."""
+    table = _version_table()
+    if not inspect(conn).has_table(table.name):
+        return None
+    return conn.execute(select(func.max(table.c.version))).scalar()
+
+
+def _stamp(conn, version, description):
+    conn.execute(_version_table().insert().values(
+        version=version, description=description, applied_at=datetime.utcnow()
+    ))
+
+
+# ---------- Commands ----------
+def upgrade(engine=None):
+    """Bring the database to LATEST_VERSION; returns the list of applied versions."""
+    engine = engine or db.engine
+    applied = []
+    with engine.begin() as conn:
+        version = current_version(conn)
+        _version_table().create(bind=conn, checkfirst=True)
+
+        if version is None and not _has_app_tables(conn):
+            # Fresh database: create everything and stamp the latest version
+            db.metadata.create_all(bind=conn, checkfirst=True)
+            _stamp(conn, LATEST_VERSION, "Initial schema")
+            return [LATEST_VERSION]
+
+        for number, description, migrate in MIGRATIONS:
+            if version is not None and number <= version:
+                continue
+            logger.info(f"Applying schema migration {number}: {description}")
+            migrate(conn)
+            _stamp(conn, number, description)
+            applied.append(number)
+    return applied
+
+
+def _has_app_tables(conn):
+    names = set(inspect(conn).get_table_names())
+    return bool(names & (set(db.metadata.tables) - {_version_table().name}))
+
+
+def verify(engine=None):
+    """Check the version stamp only (one query); raises SchemaError when out of date."""
+    engine = engine or db.engine
+    with engine.connect() as conn:
+        version = current_version(conn)
+    if version != LATEST_VERSION:
+        raise SchemaError(
+            f"Database schema is at version {version}, the code expects {LATEST_VERSION}. "
+            f"Run `flask schema upgrade`."
+        )
+    return version
@@ -0,0 +1,359 @@
+# app/services/analytics.py
+import threading
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import func, select
+from app import db
+from app.models import Badge, Drill, DrillParticipation, Institute, QuizAttempt, StudentProgress, User
+from app.services.progress import quiz_percent
+
+# Dashboards show numbers at most this old; every worker rolls over at the
+# same wall-clock boundary, so they agree on what they show
+BUCKET_SECONDS = 900
+TREND_WEEKS = 12
+RECENT_DRILLS = 20
+# Institutes without a location are grouped under this name on the dashboard
+UNSPECIFIED_REGION = "Unspecified"
+
+
+class BucketCache:
+    """Per-key values recomputed once the wall-clock time bucket changes.
+
+    Holds one entry per key (an institute, a region, ...), so memory stays
+    bounded by the number of scopes rather than growing with time.
+    """
+
+    def __init__(self, bucket_seconds=BUCKET_SECONDS):
+        self.bucket_seconds = bucket_seconds
+        self.hits = 0
+        self.misses = 0
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def bucket(self):
+        return int(time.time() // self.bucket_seconds)
+
+    def get_or_load(self, key, loader):
+        bucket = self.bucket()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] == bucket:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        value = loader()
+        with self._lock:
+            self._data[key] = (bucket, value)
+        return value
+
+    def invalidate(self, key=None):
+        with self._lock:
+            if key is None:
+                self._data.clear()
+            else:
+                self._data.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+
+analytics_cache = BucketCache()
+
+
+class AnalyticsError(ValueError):
+    pass
+
+
+# ---------- Scoping ----------
+def _in_scope(query, institute_column, institute_id=None, region=None):
+    """Restrict ``query`` to one institute, or to every institute in a region."""
+    if institute_id is not None:
+        return query.where(institute_column == institute_id)
+    if region is not None:
+        # Same grouping as region_summary, so UNSPECIFIED_REGION selects NULL locations
+        return query.where(institute_column.in_(
+            select(Institute.institute_id).where(_region_name() == region)
+        ))
+    return query
+
+
+def _region_name():
+    return func.coalesce(Institute.location, UNSPECIFIED_REGION)
+
+
+def _student_counts():
+    """Subquery of (institute_id, students) for every institute with students."""
+    return (
+        select(User.institute_id, func.count(User.id).label("students"))
+        .where(User.role == "student")
+        .group_by(User.institute_id)
+        .subquery()
+    )
+
+
+def week_start(column):
+    """SQL expression for the Monday starting the week of ``column``."""
+    dialect = db.session.get_bind().dialect.name
+    if dialect == "postgresql":
+        return func.date(func.date_trunc("week", column))
+    if dialect in ("mysql", "mariadb"):
+        return func.date(func.subdate(column, func.weekday(column)))
+    # SQLite: move forward to Sunday, then back six days
+    return func.date(column, "weekday 0", "-6 days")
+
+
+def _rate(part, whole):
+    return round(part / whole, 4) if whole else None
+
+
+# ---------- Rollups ----------
+def _students(scope):
+    query = select(func.count(User.id)).where(User.role == "student")
+    return db.session.execute(_in_scope(query, User.institute_id, **scope)).scalar() or 0
+
+
+def _drill_totals(scope):
+    query = (
+        select(
+            func.count(func.distinct(Drill.drill_id)),
+            func.count(DrillParticipation.participation_id),
+        )
+        .select_from(Drill)
+        .outerjoin(DrillParticipation, DrillParticipation.drill_id == Drill.drill_id)
+    )
+    drills, participations = db.session.execute(_in_scope(query, Drill.institute_id, **scope)).one()
+    return drills, participations
+
+
+def _possible_pairs(scope):
+    """(student, drill) pairs that could take part: each drill counts its own institute's students."""
+    students = _student_counts()
+    query = (
+        select(func.sum(students.c.students))
+        .select_from(Drill)
+        .join(students, students.c.institute_id == Drill.institute_id)
+    )
+    return db.session.execute(_in_scope(query, Drill.institute_id, **scope)).scalar() or 0
+
+
+def _recent_drills(scope):
+    students = _student_counts()
+    query = (
+        select(
+            Drill.drill_id, Drill.title, Drill.hazard_type, Drill.scheduled_date,
+            func.count(DrillParticipation.participation_id).label("participants"),
+            func.avg(DrillParticipation.score).label("average_score"),
+            students.c.students,
+        )
+        .select_from(Drill)
+        .outerjoin(students, students.c.institute_id == Drill.institute_id)
+        .outerjoin(DrillParticipation, DrillParticipation.drill_id == Drill.drill_id)
+        .group_by(Drill.drill_id, Drill.title, Drill.hazard_type, Drill.scheduled_date, students.c.students)
+        .order_by(Drill.scheduled_date.desc())
+        .limit(RECENT_DRILLS)
+    )
+    return [
+        {
+            "drill_id": row.drill_id,
+            "title": row.title,
+            "hazard_type": row.hazard_type,
+            "scheduled_date": row.scheduled_date,
+            "participants": row.participants,
+            "participation_rate": _rate(row.participants, row.students or 0),
+            "average_score": round(row.average_score, 2) if row.average_score is not None else None,
+        }
+        for row in db.session.execute(_in_scope(query, Drill.institute_id, **scope))
+    ]
+
+
+def _by_hazard(scope):
+    # Reads the per-student progress totals rather than every attempt row
+    query = (
+        select(
+            StudentProgress.hazard_type,
+            func.count(StudentProgress.user_id).label("students"),
+            func.sum(StudentProgress.quiz_attempts).label("quiz_attempts"),
+            func.sum(StudentProgress.quiz_score_total).label("quiz_score_total"),
+            func.sum(StudentProgress.quiz_question_total).label("quiz_question_total"),
+            func.sum(StudentProgress.drills_completed).label("drills_completed"),
+            func.sum(StudentProgress.drill_score_total).label("drill_score_total"),
+        )
+        .join(User, User.id == StudentProgress.user_id)
+        .group_by(StudentProgress.hazard_type)
+        .order_by(StudentProgress.hazard_type)
+    )
+    return [
+        {
+            "hazard_type": row.hazard_type,
+            "students": row.students,
+            "quiz_attempts": row.quiz_attempts,
+            "quiz_average_percent": quiz_percent(row.quiz_score_total, row.quiz_question_total),
+            "drills_completed": row.drills_completed,
+            "drill_average_score": (round(row.drill_score_total / row.drills_completed, 2)
+                                    if row.drills_completed else None),
+        }
+        for row in db.session.execute(_in_scope(query, User.institute_id, **scope))
+    ]
+
+
+def _badges(scope):
+    query = (
+        select(Badge.name, func.count(DrillParticipation.participation_id))
+        .join(DrillParticipation, DrillParticipation.badge_id == Badge.badge_id)
+        .join(Drill, Drill.drill_id == DrillParticipation.drill_id)
+        .group_by(Badge.name)
+        .order_by(Badge.name)
+    )
+    return dict(db.session.execute(_in_scope(query, Drill.institute_id, **scope)).all())
+
+
+def _weekly_trend(scope, since):
+    drill_week = week_start(DrillParticipation.completed_at)
+    drills = (
+        select(drill_week, func.count(), func.count(DrillParticipation.badge_id))
+        .select_from(DrillParticipation)
+        .join(Drill, Drill.drill_id == DrillParticipation.drill_id)
+        .where(DrillParticipation.completed_at >= since)
+        .group_by(drill_week)
+    )
+    quiz_week = week_start(QuizAttempt.attempted_at)
+    quizzes = (
+        select(quiz_week, func.count(), func.sum(QuizAttempt.score), func.sum(QuizAttempt.total_questions))
+        .select_from(QuizAttempt)
+        .join(User, User.id == QuizAttempt.user_id)
+        .where(QuizAttempt.attempted_at >= since)
+        .group_by(quiz_week)
+    )
+
+    weeks = {}
+    for week, participations, badges in db.session.execute(_in_scope(drills, Drill.institute_id, **scope)):
+        weeks[str(week)] = {"week": str(week), "participations": participations, "badges": badges,
+                            "quiz_attempts": 0, "quiz_average_percent": None}
+    for week, attempts, score, questions in db.session.execute(_in_scope(quizzes, User.institute_id, **scope)):
+        entry = weeks.setdefault(str(week), {"week": str(week), "participations": 0, "badges": 0})
+        entry["quiz_attempts"] = attempts
+        entry["quiz_average_percent"] = quiz_percent(score or 0, questions or 0)
+    return [weeks[week] for week in sorted(weeks)]
+
+
+def compute_rollup(institute_id=None, region=None):
+    """All dashboard numbers for one institute, one region or (no arguments) everything.
+
+    A fixed number of GROUP BY queries, independent of how many students,
+    attempts or participations the scope holds.
+    """
+    scope = {"institute_id": institute_id, "region": region}
+    students = _students(scope)
+    drills, participations = _drill_totals(scope)
+    return {
+        "students": students,
+        "drills": drills,
+        "participations": participations,
+        # Share of the possible (student, drill) pairs that took part
+        "participation_rate": _rate(participations, _possible_pairs(scope)),
+        "recent_drills": _recent_drills(scope),
+        "by_hazard": _by_hazard(scope),
+        "badges": _badges(scope),
+        "weekly": _weekly_trend(scope, datetime.utcnow() - timedelta(weeks=TREND_WEEKS)),
+        "computed_at": datetime.utcnow(),
+    }
+
+
+def region_summary():
+    """One row per region (Institute.location) for the government dashboard."""
+    region = _region_name().label("region")
+    students = _student_counts()
+    queries = {
+        "institutes": select(region, func.count(Institute.institute_id)).group_by(region),
+        "students": (
+            select(region, func.count(User.id))
+            .select_from(Institute)
+            .join(User, User.institute_id == Institute.institute_id)
+            .where(User.role == "student")
+            .group_by(region)
+        ),
+        "drills": (
+            select(region, func.count(Drill.drill_id))
+            .select_from(Institute)
+            .join(Drill, Drill.institute_id == Institute.institute_id)
+            .group_by(region)
+        ),
+        "pairs": (
+            select(region, func.sum(students.c.students))
+            .select_from(Institute)
+            .join(Drill, Drill.institute_id == Institute.institute_id)
+            .join(students, students.c.institute_id == Institute.institute_id)
+            .group_by(region)
+        ),
+        "participations": (
+            select(region, func.count(DrillParticipation.participation_id))
+            .select_from(Institute)
+            .join(Drill, Drill.institute_id == Institute.institute_id)
+            .join(DrillParticipation, DrillParticipation.drill_id == Drill.drill_id)
+            .group_by(region)
+        ),
+        "badges": (
+            select(region, func.count(DrillParticipation.badge_id))
+            .select_from(Institute)
+            .join(Drill, Drill.institute_id == Institute.institute_id)
+            .join(DrillParticipation, DrillParticipation.drill_id == Drill.drill_id)
+            .group_by(region)
+        ),
+        "quiz_scores": (
+            select(region, func.sum(StudentProgress.quiz_score_total),
+                   func.sum(StudentProgress.quiz_question_total))
+            .select_from(Institute)
+            .join(User, User.institute_id == Institute.institute_id)
+            .join(StudentProgress, StudentProgress.user_id == User.id)
+            .group_by(region)
+        ),
+    }
+
+    regions = {}
+    for name, query in queries.items():
+        for row in db.session.execute(query):
+            entry = regions.setdefault(row[0], {"region": row[0]})
+            if name == "quiz_scores":
+                entry["quiz_average_percent"] = quiz_percent(row[1] or 0, row[2] or 0)
+            else:
+                entry[name] = row[1]
+
+    rows = []
+    for entry in sorted(regions.values(), key=lambda e: e["region"]):
+        for name in ("institutes", "students", "drills", "participations", "badges"):
+            entry.setdefault(name, 0)
+        entry.setdefault("quiz_average_percent", None)
+        entry["participation_rate"] = _rate(entry["participations"], entry.pop("pairs", 0) or 0)
+        rows.append(entry)
+    return rows
+
+
+# ---------- Cached entry points ----------
+def institute_analytics(institute_id):
+    return analytics_cache.get_or_load(("institute", institute_id),
+                                       lambda: compute_rollup(institute_id=institute_id))
+
+
+def region_analytics(region=None):
+    """Rollup for one region, or nationwide with no region.
+
+    Only regions listed by ``regions_overview`` are accepted, so the cache
+    holds one entry per real region however many ``?region=`` values are
+    tried; anything else raises AnalyticsError. A brand-new location shows
+    up with the next bucket.
+    """
+    if region is not None and region not in {row["region"] for row in regions_overview()}:
+        raise AnalyticsError(f"Unknown region '{region}'")
+    return analytics_cache.get_or_load(("region", region), lambda: compute_rollup(region=region))
+
+
+def regions_overview():
+    return analytics_cache.get_or_load(("regions",), region_summary)
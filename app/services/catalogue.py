@@ -0,0 +1,141 @@
+# app/services/catalogue.py
+import base64
+import binascii
+import json
+from datetime import datetime
+from types import SimpleNamespace
+from sqlalchemy import and_, func, or_, select
+from app import db
+from app.models import Module
+from app.services.reference_cache import reference_cache
+
+MODULE_TYPES = Module.__table__.c.module_type.type.enums
+DEFAULT_PAGE_SIZE = 12
+MAX_PAGE_SIZE = 100
+# Cards show the start of the description; the full text is never loaded for lists
+EXCERPT_LENGTH = 160
+
+# Only what a catalogue card needs; see Module for the full row
+LIST_COLUMNS = (
+    Module.module_id,
+    Module.title,
+    Module.module_type,
+    Module.region_specific,
+    Module.media_link,
+    Module.created_at,
+    Module.page_count,
+    Module.file_size,
+    Module.duration,
+    Module.quality,
+    func.substr(Module.description, 1, EXCERPT_LENGTH).label("excerpt"),
+)
+
+
+class CatalogueError(ValueError):
+    pass
+
+
+# ---------- Cursors ----------
+# A cursor is the (created_at, module_id) of the last row on the previous
+# page; newest first, with the id breaking ties between equal timestamps.
+def encode_cursor(created_at, module_id):
+    raw = json.dumps([created_at.isoformat(), module_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, module_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), int(module_id)
+    except (binascii.Error, ValueError, TypeError):
+        raise CatalogueError("Invalid cursor")
+
+
+# ---------- Validation ----------
+def _parse_type(value):
+    if value in (None, ""):
+        return None
+    if value not in MODULE_TYPES:
+        raise CatalogueError(f"module_type must be one of {', '.join(MODULE_TYPES)}")
+    return value
+
+
+def _parse_bool(value):
+    if value in (None, ""):
+        return None
+    if isinstance(value, bool):
+        return value
+    lowered = str(value).lower()
+    if lowered in ("1", "true", "yes"):
+        return True
+    if lowered in ("0", "false", "no"):
+        return False
+    raise CatalogueError("region_specific must be true or false")
+
+
+def _parse_limit(value):
+    if value in (None, ""):
+        return DEFAULT_PAGE_SIZE
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        raise CatalogueError("limit must be an integer")
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise CatalogueError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+    return limit
+
+
+# ---------- Pages ----------
+def _load_page(module_type, region_specific, after, limit):
+    query = select(*LIST_COLUMNS)
+    if module_type is not None:
+        query = query.where(Module.module_type == module_type)
+    if region_specific:
+        query = query.where(Module.region_specific.is_(True))
+    elif region_specific is not None:
+        # The column is nullable; rows saved without a value are not region specific
+        query = query.where(or_(Module.region_specific.is_(False), Module.region_specific.is_(None)))
+    if after is not None:
+        created_at, module_id = after
+        query = query.where(or_(
+            Module.created_at < created_at,
+            and_(Module.created_at == created_at, Module.module_id < module_id),
+        ))
+    query = query.order_by(Module.created_at.desc(), Module.module_id.desc()).limit(limit + 1)
+
+    rows = db.session.execute(query).mappings().all()
+    modules = [dict(row) for row in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        last = modules[-1]
+        next_cursor = encode_cursor(last["created_at"], last["module_id"])
+    return SimpleNamespace(modules=modules, next_cursor=next_cursor)
+
+
+def catalogue_page(module_type=None, region_specific=None, cursor=None, limit=None):
+    """One page of modules, newest first, and the cursor for the next page (or None).
+
+    Arguments may be raw query-string values; bad ones raise CatalogueError.
+    First pages are shared through the reference cache, so they are reset
+    by the same Module writes that reset the module lists.
+    """
+    module_type = _parse_type(module_type)
+    region_specific = _parse_bool(region_specific)
+    limit = _parse_limit(limit)
+    if cursor:
+        return _load_page(module_type, region_specific, decode_cursor(cursor), limit)
+    return reference_cache.get_or_load(
+        ("modules", "page", module_type, region_specific, limit),
+        lambda: _load_page(module_type, region_specific, None, limit),
+    )
+
+
+def to_json(page):
+    return {
+        "modules": [
+            {**module, "created_at": module["created_at"].isoformat() if module["created_at"] else None}
+            for module in page.modules
+        ],
+        "next_cursor": page.next_cursor,
+    }
@@ -0,0 +1,96 @@
+# app/services/chat_store.py
+import threading
+import uuid
+from collections import defaultdict, deque
+from flask import current_app
+from app import db
+from app.models import ChatMessage
+from app.services.chunked_summary import estimate_tokens
+
+# Never read more than this many messages back, whatever the token budget
+MAX_HISTORY_MESSAGES = 40
+
+
+def window(messages, max_tokens):
+    """Keep the newest messages (given newest first) that fit ``max_tokens``; return oldest first."""
+    kept = []
+    used = 0
+    for message in messages:
+        used += estimate_tokens(message["content"])
+        if kept and used > max_tokens:
+            break
+        kept.append(message)
+    kept.reverse()
+    return kept
+
+
+class SQLChatStore:
+    """Conversation history in the app database; every turn is an insert."""
+
+    def new_conversation(self):
+        return uuid.uuid4().hex
+
+    def append(self, conversation_id, messages):
+        db.session.add_all([
+            ChatMessage(conversation_id=conversation_id, role=role, content=content)
+            for role, content in messages
+        ])
+        db.session.commit()
+
+    def history(self, conversation_id, max_tokens):
+        rows = (
+            db.session.query(ChatMessage.role, ChatMessage.content)
+            .filter(ChatMessage.conversation_id == conversation_id)
+            .order_by(ChatMessage.message_id.desc())
+            .limit(MAX_HISTORY_MESSAGES)
+            .all()
+        )
+        return window([{"role": role, "content": content} for role, content in rows], max_tokens)
+
+    def clear(self, conversation_id):
+        ChatMessage.query.filter_by(conversation_id=conversation_id).delete()
+        db.session.commit()
+
+
+class MemoryChatStore:
+    """Per-process stand-in for development and tests."""
+
+    def __init__(self):
+        self._conversations = defaultdict(lambda: deque(maxlen=MAX_HISTORY_MESSAGES))
+        self._lock = threading.Lock()
+
+    def new_conversation(self):
+        return uuid.uuid4().hex
+
+    def append(self, conversation_id, messages):
+        with self._lock:
+            self._conversations[conversation_id].extend(
+                {"role": role, "content": content} for role, content in messages
+            )
+
+    def history(self, conversation_id, max_tokens):
+        with self._lock:
+            messages = list(self._conversations.get(conversation_id, ()))
+        messages.reverse()
+        return window(messages, max_tokens)
+
+    def clear(self, conversation_id):
+        with self._lock:
+            self._conversations.pop(conversation_id, None)
+
+
+STORES = {
+    "sql": SQLChatStore,
+    "memory": MemoryChatStore,
+}
+
+
+def init_app(app):
+    backend = app.config.get("CHAT_STORE", "sql")
+    if backend not in STORES:
+        raise ValueError(f"Unknown CHAT_STORE '{backend}'; expected one of {', '.join(STORES)}")
+    app.extensions["chat_store"] = STORES[backend]()
+
+
+def get_chat_store():
+    return current_app.extensions["chat_store"]
@@ -0,0 +1,135 @@
+# app/services/chunked_summary.py
+import logging
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# Rough token estimate for English text; good enough for budgeting chunks
+CHARS_PER_TOKEN = 4
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+|\n{2,}")
+
+
+# ---------- Splitting ----------
+def estimate_tokens(text):
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def split_sentences(text):
+    return [s.strip() for s in _SENTENCE_END.split(text) if s and s.strip()]
+
+
+def chunk_text(text, max_tokens):
+    """Group sentences into chunks of at most ``max_tokens`` (estimated).
+
+    A single sentence longer than the budget is hard-split on characters.
+    """
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    chunks = []
+    current = []
+    current_len = 0
+
+    for sentence in split_sentences(text):
+        while len(sentence) > max_chars:
+            if current:
+                chunks.append(" ".join(current))
+                current, current_len = [], 0
+            chunks.append(sentence[:max_chars])
+            sentence = sentence[max_chars:]
+        if current and current_len + len(sentence) + 1 > max_chars:
+            chunks.append(" ".join(current))
+            current, current_len = [], 0
+        current.append(sentence)
+        current_len += len(sentence) + 1
+
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+
+# ---------- Map-reduce ----------
+class ChunkedSummarizer:
+    """Summarise text of any length with a pluggable LLM.
+
+    ``llm`` is any object with ``complete(system_prompt, user_prompt, max_tokens)``
+    returning a string. Text that fits one chunk is summarised directly;
+    longer text is split on sentence boundaries, the chunks are summarised
+    concurrently (map) and the partial summaries are combined (reduce),
+    repeating the reduce until the partials fit one request.
+    """
+
+    max_reduce_rounds = 3
+
+    def __init__(self, llm, chunk_tokens=2500, max_workers=4,
+                 summary_tokens=500, partial_tokens=300):
+        self.llm = llm
+        self.chunk_tokens = chunk_tokens
+        self.max_workers = max_workers
+        self.summary_tokens = summary_tokens
+        self.partial_tokens = partial_tokens
+
+    def summarize(self, text, system_prompt, content_type):
+        """Return ``(summary, timings)``; timings are seconds per stage plus the chunk count."""
+        timings = {}
+
+        start = time.perf_counter()
+        chunks = chunk_text(text, self.chunk_tokens)
+        timings["split"] = time.perf_counter() - start
+        timings["chunks"] = len(chunks)
+
+        if len(chunks) <= 1:
+            start = time.perf_counter()
+            summary = self.llm.complete(
+                system_prompt,
+                f"Please summarize the following {content_type} content:\n\n{text}",
+                self.summary_tokens,
+            )
+            timings["summarize"] = time.perf_counter() - start
+            return summary, timings
+
+        start = time.perf_counter()
+        partials = self._map(chunks, system_prompt, content_type)
+        timings["map"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        summary = self._reduce(partials, system_prompt, content_type)
+        timings["reduce"] = time.perf_counter() - start
+        return summary, timings
+
+    def _map(self, chunks, system_prompt, content_type):
+        total = len(chunks)
+
+        def summarize_chunk(args):
+            index, chunk = args
+            return self.llm.complete(
+                system_prompt,
+                f"This is part {index + 1} of {total} of a {content_type}. "
+                f"Summarize the key points of this part only:\n\n{chunk}",
+                self.partial_tokens,
+            )
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, total)) as pool:
+            return list(pool.map(summarize_chunk, enumerate(chunks)))
+
+    def _reduce(self, partials, system_prompt, content_type):
+        combined = "\n\n".join(partials)
+        # Partials that still do not fit one request are summarised again,
+        # as long as each round actually shrinks them
+        for _ in range(self.max_reduce_rounds):
+            if estimate_tokens(combined) <= self.chunk_tokens:
+                break
+            partials = self._map(chunk_text(combined, self.chunk_tokens), system_prompt, content_type)
+            shorter = "\n\n".join(partials)
+            if len(shorter) >= len(combined):
+                break
+            combined = shorter
+        combined = combined[:self.chunk_tokens * CHARS_PER_TOKEN]
+
+        return self.llm.complete(
+            system_prompt,
+            f"Combine these partial summaries of one {content_type} into a single "
+            f"summary:\n\n{combined}",
+            self.summary_tokens,
+        )
@@ -0,0 +1,158 @@
+# app/services/content_cache.py
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def sha256_hex(data):
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    return hashlib.sha256(data).hexdigest()
+
+
+# ---------- Cache keys ----------
+def transcript_key(video_id):
+    return f"transcript:{video_id}"
+
+
+def pdf_text_key(pdf_hash, max_chars=None):
+    # Extraction stops at the summariser's budget, so the budget is part of the key
+    return f"pdf_text:{pdf_hash}:{max_chars or 'all'}"
+
+
+def summary_key(text, content_type, prompt_version):
+    return f"summary:{content_type}:v{prompt_version}:{sha256_hex(text)}"
+
+
+class ContentCache:
+    """Persistent, size-bounded LRU cache for transcripts, PDF text and summaries.
+
+    Entries live in a single SQLite file so every worker process on the host
+    shares them. When the stored size goes over ``max_bytes`` the least
+    recently read entries are evicted.
+    """
+
+    def __init__(self, path=None, max_bytes=256 * 1024 * 1024):
+        self.path = None
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        if path:
+            self.configure(path, max_bytes)
+
+    def configure(self, path, max_bytes):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._conn().execute(
+            """
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn().execute("CREATE INDEX IF NOT EXISTS ix_entries_last_access ON entries (last_access)")
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _count(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def get(self, key):
+        if not self.path:
+            return None
+        conn = self._conn()
+        row = conn.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self._count("misses")
+            return None
+        conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key))
+        self._count("hits")
+        return row[0]
+
+    def set(self, key, value):
+        if not self.path or value is None:
+            return
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO entries (key, value, size, last_access) VALUES (?, ?, ?, ?)",
+            (key, value, size, time.time()),
+        )
+        self._evict(conn)
+
+    def get_or_set(self, key, compute):
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.set(key, value)
+        return value
+
+    def _evict(self, conn):
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for key, size in conn.execute(
+                "SELECT key, size FROM entries ORDER BY last_access"
+            ).fetchall():
+                if total <= self.max_bytes:
+                    break
+                conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                total -= size
+                self._count("evictions")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def clear(self):
+        if self.path:
+            self._conn().execute("DELETE FROM entries")
+
+    def stats(self):
+        entries, size = 0, 0
+        if self.path:
+            entries, size = self._conn().execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+        total = self.hits + self.misses
+        return {
+            "entries": entries,
+            "bytes": size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+content_cache = ContentCache()
+
+
+def init_app(app):
+    path = app.config.get("CONTENT_CACHE_PATH") or os.path.join(app.instance_path, "content_cache.sqlite3")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    content_cache.configure(path, app.config.get("CONTENT_CACHE_MAX_BYTES", 256 * 1024 * 1024))
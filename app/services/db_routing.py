@@ -0,0 +1,52 @@
+# app/services/db_routing.py
+from contextlib import contextmanager
+from functools import wraps
+from flask import g, has_app_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import Select
+
+REPLICA_BIND = "replica"
+
+
+class RoutingSession(Session):
+    """Sends plain SELECTs to the "replica" bind when the current view allows it.
+
+    Everything else goes to the primary: writes, flushes, SELECT ... FOR
+    UPDATE, raw SQL, and every statement after the first write of the
+    request, so a view always reads what it has just written. Without a
+    replica configured this is the stock Flask-SQLAlchemy session.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_app_context() and g.get("db_use_replica"):
+            replica = self._db.engines.get(REPLICA_BIND)
+            if replica is not None:
+                if self._flushing or not isinstance(clause, Select) or clause._for_update_arg is not None:
+                    g.db_use_replica = False
+                else:
+                    return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def use_replica(view):
+    """Let a view's GET/HEAD requests read from the replica (other methods use the primary)."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if request.method in ("GET", "HEAD"):
+            g.db_use_replica = True
+        return view(*args, **kwargs)
+    return wrapper
+
+
+@contextmanager
+def on_primary():
+    """Read from the primary inside the block, even in a @use_replica view."""
+    if not has_app_context():
+        yield
+        return
+    previous = g.get("db_use_replica", False)
+    g.db_use_replica = False
+    try:
+        yield
+    finally:
+        g.db_use_replica = previous
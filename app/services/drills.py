@@ -0,0 +1,173 @@
+# app/services/drills.py
+from datetime import datetime
+from sqlalchemy import and_, event, inspect
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import selectinload
+from app import db
+from app.models import Drill, Question, Option, DrillParticipation
+from app.services import progress
+from app.services.reference_cache import TTLCache, get_badge
+
+
+# ---------- Drill listing ----------
+def get_institute_drills(institute_id):
+    """Return all drills for an institute with questions and options loaded.
+
+    Runs a fixed number of queries (drills, questions, options) no matter
+    how many drills or questions the institute has.
+    """
+    return (
+        Drill.query
+        .filter_by(institute_id=institute_id)
+        .options(selectinload(Drill.questions).selectinload(Question.options))
+        .order_by(Drill.scheduled_date.asc())
+        .all()
+    )
+
+
+def split_by_type(drills_list):
+    virtual_drills = [d for d in drills_list if d.drill_type == "virtual"]
+    physical_drills = [d for d in drills_list if d.drill_type == "physical"]
+    return virtual_drills, physical_drills
+
+
+# ---------- Answer keys ----------
+# drill_id -> {question_id: set(correct option ids)}
+# Built with one query per drill. Writes through the ORM in this process
+# drop the key at once (see the mapper events below); the TTL bounds how
+# long edits made elsewhere (SQL, admin tools, other workers) go unseen.
+ANSWER_KEY_TTL = 60
+answer_key_cache = TTLCache(ttl=ANSWER_KEY_TTL)
+
+
+def _load_answer_key(drill_id):
+    rows = (
+        db.session.query(Question.question_id, Option.option_id)
+        .outerjoin(Option, and_(Option.question_id == Question.question_id,
+                                Option.is_correct.is_(True)))
+        .filter(Question.drill_id == drill_id)
+        .all()
+    )
+    key = {}
+    for question_id, option_id in rows:
+        correct = key.setdefault(question_id, set())
+        if option_id is not None:
+            correct.add(option_id)
+    return key
+
+
+def get_answer_key(drill_id):
+    return answer_key_cache.get_or_load(("answer_keys", drill_id), lambda: _load_answer_key(drill_id))
+
+
+def invalidate_answer_key(drill_id=None):
+    if drill_id is None:
+        answer_key_cache.invalidate("answer_keys")
+    else:
+        answer_key_cache.discard(("answer_keys", drill_id))
+
+
+@event.listens_for(Question, "after_insert")
+@event.listens_for(Question, "after_update")
+@event.listens_for(Question, "after_delete")
+def _question_changed(mapper, connection, target):
+    invalidate_answer_key(target.drill_id)
+    # A question moved between drills must drop the old drill's key too
+    history = inspect(target).attrs.drill_id.history
+    for old_drill_id in history.deleted or ():
+        invalidate_answer_key(old_drill_id)
+
+
+@event.listens_for(Option, "after_insert")
+@event.listens_for(Option, "after_update")
+@event.listens_for(Option, "after_delete")
+def _option_changed(mapper, connection, target):
+    # Options only know their question, so drop every key rather than
+    # issuing a lookup from inside the flush.
+    invalidate_answer_key()
+
+
+# ---------- Scoring ----------
+GOLD_THRESHOLD = 5
+SILVER_THRESHOLD = 3
+
+
+def score_submission(answer_key, form):
+    """Score submitted answers (``question_<id>`` fields) against a key, in memory."""
+    score = 0
+    for question_id, correct in answer_key.items():
+        selected = form.get(f"question_{question_id}")
+        if not selected:
+            continue
+        try:
+            selected = int(selected)
+        except (TypeError, ValueError):
+            continue
+        if selected in correct:
+            score += 1
+    return score
+
+
+def badge_name_for_score(score):
+    if score >= GOLD_THRESHOLD:
+        return "Gold"
+    if score >= SILVER_THRESHOLD:
+        return "Silver"
+    return None
+
+
+def _apply_submission(participation, score, badge, hazard_type):
+    first_completion = participation.participation_id is None
+    previous_score = participation.score or 0
+    badge_added = badge is not None and participation.badge_id is None
+
+    participation.score = score
+    participation.completed_at = datetime.utcnow()
+    if badge:
+        participation.badge_id = badge.badge_id
+
+    progress.record_drill(
+        participation.user_id, hazard_type, participation.completed_at,
+        first_completion, score - previous_score, badge_added
+    )
+
+
+def record_participation(user_id, drill_id, score, participation=None, hazard_type=None):
+    """Save the participation row, its badge and the progress totals in a single commit.
+
+    ``participation`` is the user's existing row for this drill if the
+    caller already has it loaded; otherwise it is looked up. Likewise
+    ``hazard_type`` is the drill's hazard if the caller has the drill.
+    Returns ``(participation, badge_name)``.
+    """
+    if participation is None:
+        participation = DrillParticipation.query.filter_by(
+            user_id=user_id, drill_id=drill_id
+        ).first()
+    if hazard_type is None:
+        hazard_type = db.session.query(Drill.hazard_type).filter_by(drill_id=drill_id).scalar()
+
+    badge = None
+    badge_name = badge_name_for_score(score)
+    if badge_name:
+        badge = get_badge(badge_name)
+    if badge is None:
+        badge_name = None
+
+    if not participation:
+        participation = DrillParticipation(user_id=user_id, drill_id=drill_id)
+        db.session.add(participation)
+
+    try:
+        _apply_submission(participation, score, badge, hazard_type)
+        db.session.commit()
+    except IntegrityError:
+        # A concurrent submission for the same user and drill won the insert
+        db.session.rollback()
+        participation = DrillParticipation.query.filter_by(
+            user_id=user_id, drill_id=drill_id
+        ).first()
+        _apply_submission(participation, score, badge, hazard_type)
+        db.session.commit()
+
+    return participation, badge_name
@@ -0,0 +1,155 @@
+# app/services/export.py
+import csv
+import io
+from datetime import datetime, timedelta
+from sqlalchemy import select
+from werkzeug.utils import secure_filename
+from app import db
+from app.models import Badge, Drill, DrillParticipation, Institute, QuizAttempt, User
+
+# Rows fetched from the cursor per round trip, and rows per chunk sent to the client
+YIELD_PER = 2000
+ROWS_PER_CHUNK = 500
+
+HAZARD_TYPES = Drill.__table__.c.hazard_type.type.enums
+
+
+class ExportError(ValueError):
+    pass
+
+
+# ---------- Filters ----------
+def _parse_date(value, field):
+    try:
+        return datetime.strptime(value, "%Y-%m-%d")
+    except (TypeError, ValueError):
+        raise ExportError(f"{field} must be a date like 2025-01-31")
+
+
+def parse_filters(args):
+    """Validate export filters from query-string ``args``."""
+    filters = {}
+    if args.get("institute_id"):
+        try:
+            filters["institute_id"] = int(args["institute_id"])
+        except ValueError:
+            raise ExportError("institute_id must be a number")
+    if args.get("region"):
+        filters["region"] = args["region"]
+    if args.get("hazard"):
+        if args["hazard"] not in HAZARD_TYPES:
+            raise ExportError(f"hazard must be one of {', '.join(HAZARD_TYPES)}")
+        filters["hazard"] = args["hazard"]
+    if args.get("start"):
+        filters["start"] = _parse_date(args["start"], "start")
+    if args.get("end"):
+        # Inclusive end date
+        filters["end"] = _parse_date(args["end"], "end") + timedelta(days=1)
+    return filters
+
+
+def _filtered(query, institute_column, hazard_column, time_column,
+              institute_id=None, region=None, hazard=None, start=None, end=None):
+    if institute_id is not None:
+        query = query.where(institute_column == institute_id)
+    if region is not None:
+        query = query.where(Institute.location == region)
+    if hazard is not None:
+        query = query.where(hazard_column == hazard)
+    if start is not None:
+        query = query.where(time_column >= start)
+    if end is not None:
+        query = query.where(time_column < end)
+    return query
+
+
+# ---------- Datasets ----------
+def drill_results_query(**filters):
+    query = (
+        select(
+            DrillParticipation.participation_id,
+            DrillParticipation.user_id,
+            User.email,
+            Institute.institute_id,
+            Institute.name.label("institute"),
+            Institute.location.label("region"),
+            Drill.drill_id,
+            Drill.title.label("drill"),
+            Drill.drill_type,
+            Drill.hazard_type,
+            DrillParticipation.score,
+            Badge.name.label("badge"),
+            DrillParticipation.completed_at,
+        )
+        .select_from(DrillParticipation)
+        .join(Drill, Drill.drill_id == DrillParticipation.drill_id)
+        .join(Institute, Institute.institute_id == Drill.institute_id)
+        .outerjoin(User, User.id == DrillParticipation.user_id)
+        .outerjoin(Badge, Badge.badge_id == DrillParticipation.badge_id)
+        .order_by(DrillParticipation.participation_id)
+    )
+    return _filtered(query, Drill.institute_id, Drill.hazard_type,
+                     DrillParticipation.completed_at, **filters)
+
+
+def quiz_attempts_query(**filters):
+    query = (
+        select(
+            QuizAttempt.attempt_id,
+            QuizAttempt.user_id,
+            User.email,
+            Institute.institute_id,
+            Institute.name.label("institute"),
+            Institute.location.label("region"),
+            QuizAttempt.drill_id,
+            QuizAttempt.hazard_type,
+            QuizAttempt.score,
+            QuizAttempt.total_questions,
+            QuizAttempt.attempted_at,
+        )
+        .select_from(QuizAttempt)
+        .join(User, User.id == QuizAttempt.user_id)
+        .join(Institute, Institute.institute_id == User.institute_id)
+        .order_by(QuizAttempt.attempt_id)
+    )
+    return _filtered(query, User.institute_id, QuizAttempt.hazard_type,
+                     QuizAttempt.attempted_at, **filters)
+
+
+DATASETS = {
+    "drills": drill_results_query,
+    "quizzes": quiz_attempts_query,
+}
+
+
+# ---------- CSV streaming ----------
+def stream_csv(statement, executor=None, rows_per_chunk=ROWS_PER_CHUNK):
+    """Yield ``statement``'s result as CSV text chunks in constant memory.
+
+    Rows come off a server-side cursor ``YIELD_PER`` at a time (plain tuples,
+    no ORM objects) and are written to a small reused buffer, so memory does
+    not grow with the number of rows. ``executor`` is a session or
+    connection; the app session by default.
+    """
+    executor = executor if executor is not None else db.session
+    result = executor.execute(statement.execution_options(yield_per=YIELD_PER))
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(result.keys())
+    try:
+        for partition in result.partitions(rows_per_chunk):
+            writer.writerows(partition)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()
+    finally:
+        result.close()
+
+
+def export_filename(dataset, filters):
+    parts = [dataset, filters.get("region"), filters.get("hazard"),
+             datetime.utcnow().strftime("%Y%m%d")]
+    return secure_filename("-".join(str(p) for p in parts if p) + ".csv")
@@ -0,0 +1,337 @@
+# app/services/faq_cache.py
+import logging
+import math
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models import FAQEntry
+
+try:
+    import numpy as np
+except ImportError:  # the similarity index falls back to sparse Python vectors
+    np = None
+
+logger = logging.getLogger(__name__)
+
+VECTOR_DIM = 4096
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_SPACES = re.compile(r"\s+")
+
+# Function words carry no meaning for matching chatbot questions
+STOP_WORDS = frozenset(
+    "a an the i we you to do does did in on at of for during what how should can "
+    "is are my me it be when where which".split()
+)
+
+# Words that change the answer rather than the topic. A similar question is
+# only served when these match exactly: "should I use the elevator" must
+# never answer "should I not use the elevator", nor "four" answer "five".
+NEGATIONS = frozenset(
+    "not no never none nothing nobody nor neither without cannot cant dont doesnt didnt isnt "
+    "arent wasnt werent shouldnt wouldnt couldnt wont mustnt t".split()  # "don't" normalises to "don t"
+)
+NUMBER_WORDS = frozenset(
+    "zero one two three four five six seven eight nine ten eleven twelve thirteen fourteen "
+    "fifteen sixteen seventeen eighteen nineteen twenty thirty forty fifty sixty seventy eighty "
+    "ninety hundred thousand million half once twice first second third".split()
+)
+# "unsafe" vs "safe", "nonflammable" vs "flammable"
+NEGATING_PREFIXES = ("un", "non", "in", "im", "ir", "il", "dis")
+
+# Entries a similar question may be answered from; chat-learned answers are
+# only served for the exact question until someone reviews them
+TRUSTED_SOURCES = ("seed", "reviewed")
+
+
+# ---------- Text features ----------
+def normalize(text):
+    text = _PUNCTUATION.sub(" ", text.lower())
+    return _SPACES.sub(" ", text).strip()
+
+
+def vectorize(normalized):
+    """Hashed bag of content words and their character trigrams, L2-normalised, as {index: weight}."""
+    words = [w for w in normalized.split() if w not in STOP_WORDS] or normalized.split()
+    padded = f" {' '.join(words)} "
+    features = words + [padded[i:i + 3] for i in range(len(padded) - 2)]
+
+    vector = {}
+    for feature in features:
+        index = zlib.crc32(feature.encode("utf-8")) % VECTOR_DIM
+        vector[index] = vector.get(index, 0.0) + 1.0
+    norm = math.sqrt(sum(w * w for w in vector.values())) or 1.0
+    return {i: w / norm for i, w in vector.items()}
+
+
+def _critical_words(words):
+    return {w for w in words if w in NEGATIONS or w in NUMBER_WORDS or w.isdigit()}
+
+
+def compatible(a, b):
+    """Whether normalised questions ``a`` and ``b`` agree on negation and numbers."""
+    words_a, words_b = set(a.split()), set(b.split())
+    if _critical_words(words_a) != _critical_words(words_b):
+        return False
+    only_a, only_b = words_a - words_b, words_b - words_a
+    for words, others in ((only_a, only_b), (only_b, only_a)):
+        for word in words:
+            if any(word.startswith(p) and word[len(p):] in others for p in NEGATING_PREFIXES):
+                return False
+    return True
+
+
+def _dense(vector):
+    dense = np.zeros(VECTOR_DIM, dtype=np.float32)
+    for i, w in vector.items():
+        dense[i] = w
+    return dense
+
+
+# ---------- Per-language index ----------
+class _LanguageIndex:
+    def __init__(self):
+        self.entries = OrderedDict()  # normalized question -> answer, in LRU order
+        self.vectors = {}  # trusted entries only; the rest are matched exactly
+        self._matrix = None
+        self._keys = None
+
+    def add(self, normalized, answer, trusted=False):
+        self.entries[normalized] = answer
+        self.entries.move_to_end(normalized)
+        if trusted:
+            self.vectors[normalized] = vectorize(normalized)
+            self._matrix = None
+
+    def remove(self, normalized):
+        self.entries.pop(normalized, None)
+        self.vectors.pop(normalized, None)
+        self._matrix = None
+
+    def nearest(self, normalized):
+        """Return ``(normalized_question, similarity)`` of the closest trusted entry, or ``(None, 0)``."""
+        if not self.vectors:
+            return None, 0.0
+        query = vectorize(normalized)
+
+        if np is not None:
+            if self._matrix is None:
+                self._keys = list(self.vectors)
+                self._matrix = np.stack([_dense(self.vectors[k]) for k in self._keys])
+            scores = self._matrix @ _dense(query)
+            best = int(scores.argmax())
+            return self._keys[best], float(scores[best])
+
+        best_key, best_score = None, 0.0
+        for key, vector in self.vectors.items():
+            score = sum(w * vector.get(i, 0.0) for i, w in query.items())
+            if score > best_score:
+                best_key, best_score = key, score
+        return best_key, best_score
+
+
+class FAQCache:
+    """Answer cache for first-turn chatbot questions.
+
+    Exact matches on the normalised question (per language) are served
+    directly; otherwise the most similar seeded or reviewed question above
+    ``threshold`` is used, provided the two agree on negations and numbers.
+    Entries are persisted in ``faq_entries`` so every worker shares them
+    and seeded answers survive restarts. Each process keeps an in-memory
+    index that is reloaded every ``refresh_interval`` seconds. Chat-learned
+    entries beyond ``max_entries`` are evicted least recently used first;
+    seeded and reviewed entries are never evicted. Only ``languages`` are
+    cached; questions in any other language bypass the cache.
+    """
+
+    def __init__(self, threshold=0.9, max_entries=2000, refresh_interval=300, languages=("en",)):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.refresh_interval = refresh_interval
+        self.languages = languages
+        self.exact_hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.rejected = 0
+        self._indexes = {}
+        self._trusted = set()
+        self._loaded_at = None
+        self._lock = threading.RLock()
+
+    # ----- loading -----
+    def _ensure_loaded(self):
+        if self._loaded_at is None or time.monotonic() - self._loaded_at >= self.refresh_interval:
+            self.load()
+
+    def load(self):
+        rows = (
+            db.session.query(FAQEntry.lang, FAQEntry.normalized_question, FAQEntry.answer, FAQEntry.source)
+            .order_by(FAQEntry.created_at)
+            .all()
+        )
+        indexes = {}
+        trusted = set()
+        for lang, normalized, answer, source in rows:
+            indexes.setdefault(lang, _LanguageIndex()).add(normalized, answer, source in TRUSTED_SOURCES)
+            if source in TRUSTED_SOURCES:
+                trusted.add((lang, normalized))
+        with self._lock:
+            self._indexes = indexes
+            self._trusted = trusted
+            self._loaded_at = time.monotonic()
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded_at = None
+
+    def language(self, value):
+        """``value`` from a request as a cached language code ("en-US" -> "en"), or None.
+
+        A missing value means the first configured language.
+        """
+        if value in (None, ""):
+            return self.languages[0]
+        if not isinstance(value, str):
+            return None
+        code = value.strip().lower().replace("_", "-").split("-")[0]
+        return code if code in self.languages else None
+
+    # ----- lookups -----
+    def lookup(self, question, lang="en"):
+        normalized = normalize(question)
+        lang = self.language(lang)
+        if not normalized or lang is None:
+            return None
+        self._ensure_loaded()
+
+        with self._lock:
+            index = self._indexes.get(lang)
+            if index is None:
+                self.misses += 1
+                return None
+
+            answer = index.entries.get(normalized)
+            if answer is not None:
+                index.entries.move_to_end(normalized)
+                self.exact_hits += 1
+                return answer
+
+            key, score = index.nearest(normalized)
+            if key is not None and score >= self.threshold and not compatible(normalized, key):
+                self.rejected += 1
+                logger.info(f"FAQ cache rejected '{key}' ({score:.2f}) for '{normalized}': "
+                            "negation or numbers differ")
+            elif key is not None and score >= self.threshold:
+                index.entries.move_to_end(key)
+                self.similar_hits += 1
+                logger.info(f"FAQ cache similarity hit ({score:.2f}) for '{normalized}'")
+                return index.entries[key]
+
+            self.misses += 1
+            return None
+
+    # ----- writes -----
+    def store(self, question, lang, answer, source="chat"):
+        normalized = normalize(question)
+        lang = self.language(lang)
+        if not normalized or not answer or lang is None:
+            return
+        self._ensure_loaded()
+
+        entry = FAQEntry.query.filter_by(lang=lang, normalized_question=normalized).first()
+        if entry is None:
+            db.session.add(FAQEntry(lang=lang, question=question, normalized_question=normalized,
+                                    answer=answer, source=source))
+        elif source in TRUSTED_SOURCES:
+            entry.answer = answer
+            entry.source = source
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # Another worker stored the same question first
+            db.session.rollback()
+
+        with self._lock:
+            trusted = source in TRUSTED_SOURCES
+            self._indexes.setdefault(lang, _LanguageIndex()).add(normalized, answer, trusted)
+            if trusted:
+                self._trusted.add((lang, normalized))
+        self._evict()
+
+    def seed(self, pairs, lang="en"):
+        """Store ``(question, answer)`` pairs as permanent entries."""
+        if self.language(lang) is None:
+            raise ValueError(f"Language must be one of {', '.join(self.languages)}")
+        count = 0
+        for question, answer in pairs:
+            self.store(question, lang, answer, source="seed")
+            count += 1
+        return count
+
+    def pending(self, limit=50):
+        """Chat-learned entries awaiting review, oldest first."""
+        return FAQEntry.query.filter_by(source="chat").order_by(FAQEntry.created_at).limit(limit).all()
+
+    def approve(self, faq_ids):
+        """Mark chat-learned entries as reviewed so similar questions may use them."""
+        count = (
+            FAQEntry.query
+            .filter(FAQEntry.faq_id.in_(faq_ids), FAQEntry.source == "chat")
+            .update({"source": "reviewed"}, synchronize_session=False)
+        )
+        db.session.commit()
+        self.invalidate()
+        return count
+
+    def _evict(self):
+        with self._lock:
+            learned = [(lang, key) for lang, index in self._indexes.items()
+                       for key in index.entries if (lang, key) not in self._trusted]
+            # OrderedDicts are in LRU order per language; evict from the front
+            overflow = len(learned) - self.max_entries
+            if overflow <= 0:
+                return
+            victims = learned[:overflow]
+            for lang, key in victims:
+                self._indexes[lang].remove(key)
+            self.evictions += len(victims)
+
+        for lang, key in victims:
+            FAQEntry.query.filter_by(lang=lang, normalized_question=key, source="chat").delete()
+        db.session.commit()
+
+    def clear(self, include_seeded=False):
+        query = FAQEntry.query
+        if not include_seeded:
+            query = query.filter_by(source="chat")
+        query.delete()
+        db.session.commit()
+        self.invalidate()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.exact_hits + self.similar_hits + self.misses
+            return {
+                "entries": sum(len(index.entries) for index in self._indexes.values()),
+                "trusted": len(self._trusted),
+                "exact_hits": self.exact_hits,
+                "similar_hits": self.similar_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "rejected": self.rejected,
+                "hit_rate": (self.exact_hits + self.similar_hits) / lookups if lookups else 0.0,
+                "vector_backend": "numpy" if np is not None else "python",
+            }
+
+
+faq_cache = FAQCache()
+
+
+def init_app(app):
+    faq_cache.threshold = app.config.get("FAQ_SIMILARITY_THRESHOLD", faq_cache.threshold)
+    faq_cache.max_entries = app.config.get("FAQ_CACHE_SIZE", faq_cache.max_entries)
+    faq_cache.languages = app.config.get("FAQ_LANGUAGES", faq_cache.languages)
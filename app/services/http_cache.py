@@ -0,0 +1,133 @@
+# app/services/http_cache.py
+import hashlib
+import os
+import threading
+import time
+from functools import wraps
+from types import SimpleNamespace
+from flask import current_app, make_response, render_template, request, session
+from flask_login import current_user
+from jinja2 import meta
+from markupsafe import Markup
+from sqlalchemy import event
+from app.models import Module
+from app.services.catalogue import catalogue_page
+from app.services.reference_cache import TTLCache, latest_modules
+
+CACHE_CONTROL = "private, no-cache"
+
+_template_versions = {}
+_template_lock = threading.Lock()
+
+
+# ---------- Template versions ----------
+def _template_files(env, name, seen):
+    """``name`` plus every template it extends, includes or imports."""
+    if name in seen:
+        return
+    source, filename, _ = env.loader.get_source(env, name)
+    seen[name] = filename
+    for parent in meta.find_referenced_templates(env.parse(source)):
+        if parent is not None:
+            _template_files(env, parent, seen)
+
+
+def template_version(names):
+    """Newest modification time of ``names`` and their parent templates.
+
+    Looked up once per process unless templates auto-reload (debug).
+    """
+    names = tuple(names)
+    reload = current_app.debug or current_app.config.get("TEMPLATES_AUTO_RELOAD")
+    with _template_lock:
+        version = _template_versions.get(names)
+    if version is None or reload:
+        env = current_app.jinja_env
+        files = {}
+        for name in names:
+            _template_files(env, name, files)
+        version = str(max((os.stat(path).st_mtime_ns for path in files.values()), default=0))
+        with _template_lock:
+            _template_versions[names] = version
+    return version
+
+
+# ---------- Conditional GET ----------
+def _variant():
+    """The parts of a cached page that differ between visitors."""
+    user = f"{current_user.id}:{current_user.role}" if current_user.is_authenticated else "anonymous"
+    # Pages embed a CSRF token signed with a timestamp; revalidating within
+    # half its lifetime keeps a page answered with 304 from expiring early
+    limit = current_app.config.get("WTF_CSRF_TIME_LIMIT", 3600) or 0
+    bucket = int(time.time() // (limit / 2)) if limit else 0
+    token = session.get(current_app.config.get("WTF_CSRF_FIELD_NAME", "csrf_token"), "")
+    return f"{user}|{token}|{bucket}"
+
+
+def _etag(templates, version):
+    parts = [template_version(templates), version() if version else "", _variant()]
+    return hashlib.sha1("|".join(parts).encode()).hexdigest()
+
+
+def conditional(*templates, version=None):
+    """Serve GETs with an ETag and answer a matching If-None-Match with 304.
+
+    The tag covers ``templates`` (with everything they extend), an optional
+    ``version()`` for data the page shows, and the visitor: their login and
+    CSRF token. A page with pending flash messages is always rendered.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method not in ("GET", "HEAD") or session.get("_flashes"):
+                return view(*args, **kwargs)
+
+            etag = _etag(templates, version)
+            if etag in request.if_none_match:
+                response = current_app.response_class(status=304)
+                response.set_etag(etag)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+                # Rendering may have just created the session's CSRF token
+                response.set_etag(_etag(templates, version))
+            response.headers["Cache-Control"] = CACHE_CONTROL
+            response.vary.add("Cookie")
+            return response
+        return wrapper
+    return decorator
+
+
+# ---------- Module catalogue fragments ----------
+fragment_cache = TTLCache(ttl=300)
+
+
+def module_catalogue():
+    """Pre-rendered module grid and "latest modules" list, plus a content hash for ETags.
+
+    The grid holds the first catalogue page of each section; the page loads
+    the rest from /student/modules/catalogue as the visitor scrolls.
+    Rendered once and reused until a Module is written (or the TTL passes,
+    which bounds how long other workers show the old list).
+    """
+    def render():
+        pages = {section: catalogue_page(module_type=section) for section in ("pdf", "video", "text")}
+        grid = render_template("student/_module_grid.html", pages=pages)
+        latest = render_template("student/_latest_modules.html", latest_modules=latest_modules())
+        etag = hashlib.sha1((grid + latest).encode()).hexdigest()
+        return SimpleNamespace(grid=Markup(grid), latest=Markup(latest), etag=etag)
+
+    return fragment_cache.get_or_load(("modules", "catalogue"), render)
+
+
+def catalogue_version():
+    return module_catalogue().etag
+
+
+def _invalidate_catalogue(mapper, connection, target):
+    fragment_cache.invalidate("modules")
+
+
+for _name in ("after_insert", "after_update", "after_delete"):
+    event.listen(Module, _name, _invalidate_catalogue)
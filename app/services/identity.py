@@ -0,0 +1,70 @@
+# app/services/identity.py
+from flask_login import UserMixin
+from sqlalchemy import event
+from sqlalchemy.orm import joinedload
+from app.models import User, Student, Institute
+from app.services.reference_cache import TTLCache, snapshot
+
+# Seconds a worker may serve a cached identity; writes in this process
+# invalidate immediately, other workers catch up within the TTL
+IDENTITY_TTL = 30
+
+identity_cache = TTLCache(ttl=IDENTITY_TTL)
+
+
+class SessionUser(UserMixin):
+    """Read-only copy of a User, with its institute and student profile, used as current_user.
+
+    Plain attributes only, so one copy can be shared by concurrent requests
+    without being bound to a database session. Load the User row itself
+    to change it.
+    """
+
+    def __init__(self, user):
+        self.__dict__.update(vars(snapshot(user)))
+        self.institute = snapshot(user.institute)
+        self.student = snapshot(user.student)
+
+    def __repr__(self):
+        return f"<SessionUser {self.id} {self.role}>"
+
+
+def fetch_user(user_id):
+    """The user with institute and student profile, in one joined query."""
+    user = (
+        User.query
+        .options(joinedload(User.institute), joinedload(User.student))
+        .filter(User.id == user_id)
+        .first()
+    )
+    return SessionUser(user) if user else None
+
+
+def load_user(user_id):
+    try:
+        user_id = int(user_id)
+    except (TypeError, ValueError):
+        return None
+    return identity_cache.get_or_load(("user", user_id), lambda: fetch_user(user_id))
+
+
+def forget_user(user_id):
+    identity_cache.discard(("user", int(user_id)))
+
+
+# ---------- Invalidation ----------
+def _forget_target_user(mapper, connection, target):
+    user_id = target.id if isinstance(target, User) else target.user_id
+    if user_id is not None:
+        forget_user(user_id)
+
+
+def _forget_all(mapper, connection, target):
+    # Institute rows are shared by many users; they change rarely
+    identity_cache.invalidate("user")
+
+
+for _model, _handler in ((User, _forget_target_user), (Student, _forget_target_user),
+                         (Institute, _forget_all)):
+    for _name in ("after_insert", "after_update", "after_delete"):
+        event.listen(_model, _name, _handler)
@@ -0,0 +1,391 @@
+# app/services/jobs.py
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+# A running job's updated_at is refreshed every LEASE_SECONDS / 3 while its
+# handler runs; one not refreshed for LEASE_SECONDS belonged to a worker
+# that died (recycled, timed out, redeployed) and is reclaimed.
+LEASE_SECONDS = 60
+MAX_ATTEMPTS = 2
+# Finished jobs (and their results) are deleted this long after they end;
+# the purge runs at most once per PURGE_INTERVAL in each process
+RETENTION_SECONDS = 24 * 3600
+PURGE_INTERVAL = 600
+
+
+class JobStore:
+    """SQLite-backed job table shared by every worker process on the host."""
+
+    def __init__(self, path, lease_seconds=LEASE_SECONDS, max_attempts=MAX_ATTEMPTS,
+                 retention_seconds=RETENTION_SECONDS):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retention_seconds = retention_seconds
+        self._next_purge = 0.0
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                job_id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL,
+                stage TEXT,
+                result TEXT,
+                error TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_jobs_status_created ON jobs (status, created_at)")
+        # Columns added after the first release; older job files get them here
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+        added = (("dedupe_key", "TEXT"), ("started_at", "REAL"), ("attempts", "INTEGER NOT NULL DEFAULT 0"))
+        for name, ddl in added:
+            if name not in columns:
+                conn.execute(f"ALTER TABLE jobs ADD COLUMN {name} {ddl}")
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_jobs_dedupe ON jobs (dedupe_key, status)")
+        # Users who asked for each job; a shared (deduplicated) job has several
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS job_requesters (
+                job_id TEXT NOT NULL,
+                user_id INTEGER NOT NULL,
+                PRIMARY KEY (job_id, user_id)
+            )
+            """
+        )
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def add(self, kind, payload, dedupe_key=None, user_id=None):
+        """Queue a job and return its id.
+
+        With a ``dedupe_key``, a job with the same key that is still queued,
+        or running under a live lease, is returned instead, so identical
+        requests from any worker share one job. Abandoned jobs are
+        reclaimed first and never shared. ``user_id`` is recorded as one of
+        the job's requesters (see ``requested_by``).
+        """
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            now = time.time()
+            row = None
+            if dedupe_key is not None:
+                self._reclaim(conn, now)
+                row = conn.execute(
+                    "SELECT job_id FROM jobs WHERE dedupe_key = ? AND (status = 'queued' "
+                    "OR (status = 'running' AND updated_at >= ?)) ORDER BY created_at LIMIT 1",
+                    (dedupe_key, now - self.lease_seconds),
+                ).fetchone()
+            if row is not None:
+                job_id = row["job_id"]
+            else:
+                job_id = uuid.uuid4().hex
+                conn.execute(
+                    "INSERT INTO jobs (job_id, kind, payload, status, dedupe_key, created_at, updated_at) "
+                    "VALUES (?, ?, ?, 'queued', ?, ?, ?)",
+                    (job_id, kind, json.dumps(payload), dedupe_key, now, now),
+                )
+            if user_id is not None:
+                conn.execute(
+                    "INSERT OR IGNORE INTO job_requesters (job_id, user_id) VALUES (?, ?)", (job_id, user_id)
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return job_id
+
+    def _reclaim(self, conn, now):
+        """Requeue running jobs whose lease expired, or fail them after ``max_attempts``."""
+        deadline = now - self.lease_seconds
+        failed = conn.execute(
+            "UPDATE jobs SET status = 'failed', error = 'Worker stopped while running the job', "
+            "updated_at = ? WHERE status = 'running' AND updated_at < ? AND attempts >= ?",
+            (now, deadline, self.max_attempts),
+        ).rowcount
+        requeued = conn.execute(
+            "UPDATE jobs SET status = 'queued', stage = NULL, started_at = NULL, updated_at = ? "
+            "WHERE status = 'running' AND updated_at < ?",
+            (now, deadline),
+        ).rowcount
+        if failed or requeued:
+            logger.warning(f"Reclaimed abandoned jobs: {requeued} requeued, {failed} failed")
+
+    def _purge(self, conn, now):
+        """Delete jobs that finished more than ``retention_seconds`` ago."""
+        if now < self._next_purge:
+            return
+        self._next_purge = now + PURGE_INTERVAL
+        expired = "SELECT job_id FROM jobs WHERE status IN ('done', 'failed') AND updated_at < ?"
+        cutoff = now - self.retention_seconds
+        conn.execute(f"DELETE FROM job_requesters WHERE job_id IN ({expired})", (cutoff,))
+        purged = conn.execute(
+            "DELETE FROM jobs WHERE status IN ('done', 'failed') AND updated_at < ?", (cutoff,)
+        ).rowcount
+        if purged:
+            logger.info(f"Purged {purged} finished jobs")
+
+    def claim(self):
+        """Atomically move the oldest queued job to running and return it.
+
+        Jobs abandoned by a dead worker are reclaimed first, and expired
+        finished jobs purged.
+        """
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            now = time.time()
+            self._reclaim(conn, now)
+            self._purge(conn, now)
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE jobs SET status = 'running', started_at = ?, updated_at = ?, "
+                    "attempts = attempts + 1 WHERE job_id = ?",
+                    (now, now, row["job_id"]),
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return dict(row) if row is not None else None
+
+    def update(self, job_id, **fields):
+        if "result" in fields:
+            fields["result"] = json.dumps(fields["result"])
+        fields["updated_at"] = time.time()
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        self._conn().execute(
+            f"UPDATE jobs SET {columns} WHERE job_id = ?",
+            (*fields.values(), job_id),
+        )
+
+    def heartbeat(self, job_id):
+        """Extend a running job's lease."""
+        self._conn().execute(
+            "UPDATE jobs SET updated_at = ? WHERE job_id = ? AND status = 'running'",
+            (time.time(), job_id),
+        )
+
+    def requested_by(self, job_id, user_id):
+        return self._conn().execute(
+            "SELECT 1 FROM job_requesters WHERE job_id = ? AND user_id = ?", (job_id, user_id)
+        ).fetchone() is not None
+
+    def get(self, job_id):
+        row = self._conn().execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def position(self, job_id):
+        """1-based place of a queued job in line, or None once it has started."""
+        row = self._conn().execute(
+            "SELECT COUNT(*) AS ahead FROM jobs AS j WHERE j.status = 'queued' AND j.created_at <= "
+            "(SELECT created_at FROM jobs WHERE job_id = ? AND status = 'queued')",
+            (job_id,),
+        ).fetchone()
+        return row["ahead"] or None
+
+    def stats(self, window=3600):
+        """Queue depth and how long jobs started in the last ``window`` seconds waited."""
+        now = time.time()
+        conn = self._conn()
+        counts = dict(conn.execute(
+            "SELECT status, COUNT(*) FROM jobs WHERE status IN ('queued', 'running') GROUP BY status"
+        ).fetchall())
+        oldest = conn.execute("SELECT MIN(created_at) FROM jobs WHERE status = 'queued'").fetchone()[0]
+        waited, average_wait = conn.execute(
+            "SELECT COUNT(*), AVG(started_at - created_at) FROM jobs WHERE started_at >= ?",
+            (now - window,),
+        ).fetchone()
+        return {
+            "queued": counts.get("queued", 0),
+            "running": counts.get("running", 0),
+            "oldest_queued_seconds": now - oldest if oldest is not None else 0.0,
+            "recently_started": waited,
+            "average_wait_seconds": average_wait or 0.0,
+        }
+
+
+class JobQueue:
+    """Runs registered job handlers on a pool of daemon worker threads.
+
+    Workers poll the shared store, so a job enqueued by one gunicorn worker
+    can be picked up by an idle thread in any other.
+    """
+
+    def __init__(self, store, workers=2, poll_interval=1.0):
+        self.store = store
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.handlers = {}
+        self.app = None
+        self._wakeup = threading.Event()
+        self._threads = []
+        self._lock = threading.Lock()
+
+    def register(self, kind):
+        def decorator(func):
+            self.handlers[kind] = func
+            return func
+        return decorator
+
+    def enqueue(self, kind, payload, dedupe_key=None, user_id=None):
+        if kind not in self.handlers:
+            raise ValueError(f"No handler registered for job kind '{kind}'")
+        job_id = self.store.add(kind, payload, dedupe_key, user_id)
+        self.start()
+        self._wakeup.set()
+        return job_id
+
+    def get(self, job_id):
+        return self.store.get(job_id)
+
+    def update(self, job_id, **fields):
+        self.store.update(job_id, **fields)
+
+    def requested_by(self, job_id, user_id):
+        return self.store.requested_by(job_id, user_id)
+
+    def position(self, job_id):
+        return self.store.position(job_id)
+
+    def stats(self):
+        stats = self.store.stats()
+        stats["workers"] = self.workers
+        return stats
+
+    def start(self):
+        with self._lock:
+            if self._threads or self.workers <= 0:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def run_pending(self):
+        """Run queued jobs on the calling thread until none are left."""
+        while self._run_one():
+            pass
+
+    def _work(self):
+        while True:
+            try:
+                if not self._run_one():
+                    self._wakeup.wait(self.poll_interval)
+                    self._wakeup.clear()
+            except Exception as e:
+                logger.error(f"Job worker error: {e}")
+                time.sleep(self.poll_interval)
+
+    def _run_one(self):
+        job = self.store.claim()
+        if job is None:
+            return False
+
+        job_id = job["job_id"]
+        handler = self.handlers.get(job["kind"])
+        payload = json.loads(job["payload"])
+        logger.info(f"Running job {job_id} ({job['kind']})")
+
+        def set_stage(stage):
+            self.store.update(job_id, stage=stage)
+
+        stop = threading.Event()
+        heartbeat = threading.Thread(
+            target=self._heartbeat, args=(job_id, stop), name=f"job-heartbeat-{job_id[:8]}", daemon=True
+        )
+        heartbeat.start()
+        try:
+            if handler is None:
+                raise ValueError(f"No handler registered for job kind '{job['kind']}'")
+            if self.app is not None:
+                with self.app.app_context():
+                    result = handler(payload, set_stage)
+            else:
+                result = handler(payload, set_stage)
+            self.store.update(job_id, status="done", stage=None, result=result)
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {e}")
+            self.store.update(job_id, status="failed", error=str(e))
+        finally:
+            stop.set()
+        return True
+
+    def _heartbeat(self, job_id, stop):
+        while not stop.wait(self.store.lease_seconds / 3):
+            try:
+                self.store.heartbeat(job_id)
+            except Exception as e:
+                logger.error(f"Job {job_id} heartbeat failed: {e}")
+
+
+job_queue = JobQueue(store=None)
+
+
+def init_app(app):
+    path = app.config.get("JOB_QUEUE_PATH") or os.path.join(app.instance_path, "jobs.sqlite3")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    job_queue.store = JobStore(
+        path,
+        lease_seconds=app.config.get("JOB_LEASE_SECONDS", LEASE_SECONDS),
+        max_attempts=app.config.get("JOB_MAX_ATTEMPTS", MAX_ATTEMPTS),
+        retention_seconds=app.config.get("JOB_RETENTION_SECONDS", RETENTION_SECONDS),
+    )
+    job_queue.workers = app.config.get("JOB_WORKERS", 2)
+    job_queue.app = app
+
+
+# ---------- Job handlers ----------
+@job_queue.register("summarize_video")
+def _summarize_video_job(payload, set_stage):
+    from app.services.summarizer import summarize_video_url
+    return {"summary": summarize_video_url(payload["video_url"], set_stage)}
+
+
+@job_queue.register("import_roster")
+def _import_roster_job(payload, set_stage):
+    from app.services import roster
+
+    def progress(done, total):
+        set_stage(f"Created {done} of {total} accounts")
+
+    # Hash on this thread: forking a process pool inside a web worker is
+    # unsafe, and the job's lease keeps a long import alive. Supplied
+    # passwords arrive already hashed; generated ones stay in the result
+    # only until the report is first downloaded.
+    rows = [(line, row) for line, row in payload["rows"]]
+    report = roster.import_roster(rows, payload["institute_id"], workers=1, on_progress=progress)
+    return {
+        "rows": len(report),
+        "created": sum(entry["status"] == "created" for entry in report),
+        "report": report,
+        "passwords_cleared": False,
+    }
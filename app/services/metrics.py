@@ -0,0 +1,377 @@
+# app/services/metrics.py
+import hmac
+import logging
+import math
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from flask import Response, abort, current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+# Statements shown in a slow-request log entry
+SLOW_LOG_TOP = 5
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _number(value):
+    # repr keeps every digit; "{:g}" would print 1234567 as 1.23457e+06
+    if isinstance(value, bool):
+        value = int(value)
+    if isinstance(value, float) and not math.isfinite(value):
+        return "NaN" if math.isnan(value) else ("+Inf" if value > 0 else "-Inf")
+    return repr(value)
+
+
+# ---------- Metric types ----------
+class Counter:
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] += amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for values, total in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labels, values)} {_number(total)}")
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus text format."""
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        # label values -> [per-bucket counts..., +Inf count], sum
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            counts = series[0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            else:
+                counts[-1] += 1
+            series[1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for values, (counts, total) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip((*self.buckets, "+Inf"), counts):
+                    cumulative += count
+                    le = bound if bound == "+Inf" else f"{bound:g}"
+                    lines.append(f"{self.name}_bucket{_labels(self.labels, values, [('le', le)])} {cumulative}")
+                lines.append(f"{self.name}_sum{_labels(self.labels, values)} {_number(total)}")
+                lines.append(f"{self.name}_count{_labels(self.labels, values)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Metrics for this process plus collectors that read other services' stats at scrape time.
+
+    Each gunicorn worker keeps its own numbers; Prometheus sums them when
+    every worker is scraped, or the figures describe the worker that answered.
+    """
+
+    def __init__(self):
+        self.metrics = []
+        self.collectors = []
+
+    def counter(self, *args, **kwargs):
+        metric = Counter(*args, **kwargs)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, *args, **kwargs):
+        metric = Histogram(*args, **kwargs)
+        self.metrics.append(metric)
+        return metric
+
+    def collector(self, func):
+        """Register ``func() -> [(name, type, help, [(labels dict, value), ...]), ...]``."""
+        self.collectors.append(func)
+        return func
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines += metric.render()
+        for collect in self.collectors:
+            try:
+                families = collect()
+            except Exception as e:
+                logger.error(f"Metrics collector {collect.__name__} failed: {e}")
+                continue
+            for name, kind, help, samples in families:
+                lines += [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+                for labels, value in samples:
+                    lines.append(f"{name}{_labels(labels.keys(), labels.values())} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+request_seconds = registry.histogram(
+    "http_request_duration_seconds", "Request latency by endpoint.",
+    labels=("endpoint", "method", "status"))
+request_queries = registry.histogram(
+    "http_request_sql_queries", "SQL statements executed per request.",
+    labels=("endpoint",), buckets=QUERY_COUNT_BUCKETS)
+request_sql_seconds = registry.histogram(
+    "http_request_sql_seconds", "Time spent in SQL per request.", labels=("endpoint",))
+external_seconds = registry.histogram(
+    "external_call_duration_seconds", "Calls to external services (Gemini, Groq, yt-dlp).",
+    labels=("service", "outcome"))
+sql_queries = registry.counter("sql_queries_total", "SQL statements executed, in and out of requests.")
+sql_seconds = registry.counter("sql_seconds_total", "Time spent executing SQL statements.")
+
+
+# ---------- Per-request accounting ----------
+class RequestMetrics:
+    def __init__(self, keep_statements=False):
+        self.start = time.perf_counter()
+        self.sql_count = 0
+        self.sql_seconds = 0.0
+        self.external = defaultdict(float)
+        # (statement, seconds), only kept when the slow-request log is on
+        self.statements = [] if keep_statements else None
+
+
+def _current():
+    if has_request_context():
+        return g.get("_request_metrics")
+    return None
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    _finish_query(conn, statement)
+
+
+def _handle_error(context):
+    if context.connection is not None:
+        _finish_query(context.connection, context.statement)
+
+
+def _finish_query(conn, statement):
+    starts = conn.info.get("query_start")
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    sql_queries.inc()
+    sql_seconds.inc(amount=elapsed)
+    stats = _current()
+    if stats is not None:
+        stats.sql_count += 1
+        stats.sql_seconds += elapsed
+        if stats.statements is not None:
+            stats.statements.append((statement, elapsed))
+
+
+@contextmanager
+def external_call(service):
+    """Time a call to an external service, for /metrics and the current request."""
+    start = time.perf_counter()
+    outcome = "ok"
+    try:
+        yield
+    except BaseException:
+        outcome = "error"
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        external_seconds.observe(elapsed, service, outcome)
+        stats = _current()
+        if stats is not None:
+            stats.external[service] += elapsed
+
+
+def _log_slow_request(stats, method, path, endpoint, status, elapsed):
+    by_statement = defaultdict(lambda: [0, 0.0])
+    for statement, seconds in stats.statements:
+        entry = by_statement[statement]
+        entry[0] += 1
+        entry[1] += seconds
+    top = sorted(by_statement.items(), key=lambda item: item[1][1], reverse=True)[:SLOW_LOG_TOP]
+    external = ", ".join(f"{service} {seconds * 1000:.0f} ms" for service, seconds in stats.external.items())
+    lines = [
+        f"Slow request {method} {path} ({endpoint}, {status}): {elapsed * 1000:.0f} ms, "
+        f"{stats.sql_count} queries in {stats.sql_seconds * 1000:.0f} ms"
+        + (f", external: {external}" if external else "")
+    ]
+    for statement, (count, seconds) in top:
+        lines.append(f"  {seconds * 1000:8.1f} ms  x{count:<4} {' '.join(statement.split())[:200]}")
+    logger.warning("\n".join(lines))
+
+
+def _record(stats, method, path, endpoint, status, slow_seconds):
+    elapsed = time.perf_counter() - stats.start
+    request_seconds.observe(elapsed, endpoint, method, status)
+    request_queries.observe(stats.sql_count, endpoint)
+    request_sql_seconds.observe(stats.sql_seconds, endpoint)
+    if stats.statements is not None and elapsed >= slow_seconds:
+        _log_slow_request(stats, method, path, endpoint, status, elapsed)
+
+
+def _start_request():
+    g._request_metrics = RequestMetrics(keep_statements=bool(current_app.config.get("SLOW_REQUEST_MS")))
+
+
+def _end_request(response):
+    stats = g.get("_request_metrics")
+    if stats is None:
+        return response
+    # Unmatched URLs share one label so 404 probes cannot grow the series
+    endpoint = request.endpoint or "unmatched"
+    slow_seconds = (current_app.config.get("SLOW_REQUEST_MS") or 0) / 1000
+    args = (stats, request.method, request.path, endpoint, str(response.status_code), slow_seconds)
+    if response.is_streamed:
+        # Streamed bodies (SSE, CSV export) are timed until the last chunk is sent
+        response.call_on_close(lambda: _record(*args))
+    else:
+        _record(*args)
+    return response
+
+
+# ---------- Scrape-time collectors ----------
+@registry.collector
+def _throttle_metrics():
+    from app.services import throttle
+
+    stats = throttle.stats()
+    limiter, flight, jobs = stats["rate_limit"], stats["single_flight"], stats["jobs"]
+    return [
+        ("rate_limit_requests_total", "counter", "Rate-limited requests by decision.",
+         [({"decision": "allowed"}, limiter["allowed"]), ({"decision": "denied"}, limiter["denied"])]),
+        ("single_flight_coalesced_total", "counter", "Requests that shared an in-flight computation.",
+         [({}, flight["coalesced"])]),
+        ("single_flight_in_flight", "gauge", "Computations currently in flight.",
+         [({}, flight["in_flight"])]),
+        ("job_queue_jobs", "gauge", "Background jobs by status.",
+         [({"status": "queued"}, jobs["queued"]), ({"status": "running"}, jobs["running"])]),
+        ("job_queue_oldest_queued_seconds", "gauge", "Age of the oldest queued job.",
+         [({}, jobs["oldest_queued_seconds"])]),
+        ("job_queue_average_wait_seconds", "gauge", "Average queue wait of jobs started in the last hour.",
+         [({}, jobs["average_wait_seconds"])]),
+    ]
+
+
+@registry.collector
+def _faq_metrics():
+    from app.services.faq_cache import faq_cache
+
+    stats = faq_cache.stats()
+    return [
+        ("faq_cache_lookups_total", "counter", "First-turn chatbot lookups in the FAQ cache by result.",
+         [({"result": "exact"}, stats["exact_hits"]), ({"result": "similar"}, stats["similar_hits"]),
+          ({"result": "miss"}, stats["misses"]), ({"result": "rejected"}, stats["rejected"])]),
+        ("faq_cache_entries", "gauge", "FAQ entries in this worker's index.",
+         [({"trusted": "true"}, stats["trusted"]), ({"trusted": "false"}, stats["entries"] - stats["trusted"])]),
+        ("faq_cache_evictions_total", "counter", "Chat-learned FAQ entries evicted.",
+         [({}, stats["evictions"])]),
+    ]
+
+
+def _cache_samples(caches):
+    requests, entries, hit_rates = [], [], []
+    for name, stats in caches:
+        requests += [({"cache": name, "result": "hit"}, stats["hits"]),
+                     ({"cache": name, "result": "miss"}, stats["misses"])]
+        entries.append(({"cache": name}, stats["entries"]))
+        hit_rates.append(({"cache": name}, stats["hit_rate"]))
+    return [
+        ("cache_requests_total", "counter", "In-process cache lookups by cache and result.", requests),
+        ("cache_entries", "gauge", "Entries held by each cache in this worker.", entries),
+        ("cache_hit_rate", "gauge", "Hits over lookups since the worker started.", hit_rates),
+    ]
+
+
+@registry.collector
+def _cache_metrics():
+    from app.services.analytics import analytics_cache
+    from app.services.content_cache import content_cache
+    from app.services.drills import answer_key_cache
+    from app.services.http_cache import fragment_cache
+    from app.services.identity import identity_cache
+    from app.services.reference_cache import reference_cache
+
+    # The content cache file is shared by the workers on a host: its entries
+    # and bytes are host-wide, its hits and misses are this worker's
+    content = content_cache.stats()
+    return _cache_samples([
+        ("reference", reference_cache.stats()),
+        ("identity", identity_cache.stats()),
+        ("answer_keys", answer_key_cache.stats()),
+        ("fragments", fragment_cache.stats()),
+        ("analytics", analytics_cache.stats()),
+        ("content", content),
+    ]) + [
+        ("content_cache_bytes", "gauge", "Size of the transcript/PDF/summary cache file's entries.",
+         [({}, content["bytes"])]),
+        ("content_cache_max_bytes", "gauge", "Size limit of the content cache.",
+         [({}, content["max_bytes"])]),
+        ("content_cache_evictions_total", "counter", "Content cache entries evicted by this worker.",
+         [({}, content["evictions"])]),
+    ]
+
+
+# ---------- Endpoint ----------
+def metrics_view():
+    token = current_app.config.get("METRICS_TOKEN")
+    supplied = request.headers.get("Authorization", "")
+    # Constant-time comparison, so response timing does not leak the token
+    if token and not hmac.compare_digest(supplied.encode(), f"Bearer {token}".encode()):
+        abort(403)
+    return Response(registry.render(), mimetype="text/plain; version=0.0.4")
+
+
+def init_app(app):
+    if not app.config.get("METRICS_ENABLED", True):
+        return
+    # Listening on the Engine class covers every engine and bind
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(Engine, "handle_error", _handle_error)
+    app.before_request(_start_request)
+    app.after_request(_end_request)
+    if app.config.get("METRICS_REQUIRE_TOKEN") and not app.config.get("METRICS_TOKEN"):
+        logger.warning("/metrics is not served: set METRICS_TOKEN (METRICS_REQUIRE_TOKEN is on)")
+        return
+    app.add_url_rule("/metrics", "metrics", metrics_view)
@@ -0,0 +1,139 @@
+# app/services/pdf_text.py
+import io
+import logging
+import multiprocessing
+import os
+import tempfile
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from app.services.providers import providers
+
+logger = logging.getLogger(__name__)
+
+# Uploads at least this large and this long are extracted on a process pool
+PARALLEL_MIN_BYTES = 2 * 1024 * 1024
+PARALLEL_MIN_PAGES = 32
+PAGES_PER_TASK = 16
+PDF_WORKERS = min(4, os.cpu_count() or 1)
+
+
+# ---------- Sequential extraction ----------
+def iter_pdf_pages(pdf_file):
+    """Yield the text of each page lazily (``pdf_file`` may be an open PdfReader)."""
+    PyPDF2 = providers.get("pypdf")
+    reader = pdf_file if isinstance(pdf_file, PyPDF2.PdfReader) else PyPDF2.PdfReader(pdf_file)
+    for page in reader.pages:
+        yield page.extract_text() or ""
+
+
+# ---------- Parallel extraction ----------
+# One pool per web worker process, shared by every upload, so concurrent
+# requests queue for PDF_WORKERS processes instead of each starting their
+# own. Workers are started with forkserver (or spawn): forking a process
+# that already runs job and heartbeat threads is unsafe. The document goes
+# to the workers as a temporary file; each parses it once and keeps the
+# reader for the following page ranges.
+_pool = None
+_pool_lock = threading.Lock()
+_worker_reader = None
+
+
+def make_pool(workers=PDF_WORKERS):
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+    return ProcessPoolExecutor(max_workers=workers, mp_context=context)
+
+
+def shared_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = make_pool()
+        return _pool
+
+
+def _discard_pool(pool):
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _extract_range(path, start, end):
+    global _worker_reader
+    if _worker_reader is None or _worker_reader[0] != path:
+        _worker_reader = (path, providers.get("pypdf").PdfReader(path))
+    reader = _worker_reader[1]
+    return [reader.pages[i].extract_text() or "" for i in range(start, end)]
+
+
+def iter_pdf_pages_parallel(pdf_bytes, page_count, workers=PDF_WORKERS, pool=None):
+    """Yield page texts in order while a process pool extracts pages ahead.
+
+    Uses the shared pool unless ``pool`` is given. At most two page ranges
+    per worker are in flight, so closing the generator early (budget
+    reached) leaves little wasted work.
+    """
+    pool = pool or shared_pool()
+    ranges = iter([(start, min(start + PAGES_PER_TASK, page_count))
+                   for start in range(0, page_count, PAGES_PER_TASK)])
+    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as f:
+        f.write(pdf_bytes)
+    pending = deque()
+    try:
+        pending.extend(pool.submit(_extract_range, f.name, *r) for _, r in zip(range(workers * 2), ranges))
+        while pending:
+            texts = pending.popleft().result()
+            next_range = next(ranges, None)
+            if next_range:
+                pending.append(pool.submit(_extract_range, f.name, *next_range))
+            yield from texts
+    except BrokenProcessPool:
+        # A worker died (killed, out of memory); start afresh on the next upload
+        _discard_pool(pool)
+        raise
+    finally:
+        for future in pending:
+            future.cancel()
+        wait(pending)
+        os.remove(f.name)
+
+
+# ---------- Budgeted extraction ----------
+def collect_pages(pages, max_chars=None):
+    """Join page texts, stopping once ``max_chars`` characters are gathered."""
+    parts = []
+    total = 0
+    for text in pages:
+        parts.append(text + "\n")
+        total += len(text) + 1
+        if max_chars is not None and total >= max_chars:
+            break
+    if hasattr(pages, "close"):
+        pages.close()
+    return "".join(parts)
+
+
+def extract_text_from_pdf(pdf_file, max_chars=None):
+    """Extract text from a PDF (bytes or file object), up to ``max_chars``."""
+    try:
+        logger.info("Extracting text from PDF")
+        pdf_bytes = pdf_file if isinstance(pdf_file, bytes) else pdf_file.read()
+
+        reader = providers.get("pypdf").PdfReader(io.BytesIO(pdf_bytes))
+        page_count = len(reader.pages)
+        if len(pdf_bytes) >= PARALLEL_MIN_BYTES and page_count >= PARALLEL_MIN_PAGES and PDF_WORKERS > 1:
+            logger.info(f"Extracting {page_count} pages on {PDF_WORKERS} processes")
+            pages = iter_pdf_pages_parallel(pdf_bytes, page_count)
+        else:
+            pages = iter_pdf_pages(reader)
+
+        text = collect_pages(pages, max_chars)
+        logger.info(f"Extracted {len(text)} characters from PDF")
+        return text
+    except Exception as e:
+        logger.error(f"Error extracting text from PDF: {e}")
+        raise
@@ -0,0 +1,207 @@
+# app/services/progress.py
+import importlib
+from collections import defaultdict
+from sqlalchemy import String, case, cast, delete, func, insert, literal, select, union_all, update
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models import StudentProgress, QuizAttempt, DrillParticipation, Drill
+
+# Counters that are only ever incremented
+COUNTERS = (
+    "quiz_attempts", "quiz_score_total", "quiz_question_total",
+    "drills_completed", "drill_score_total", "badges",
+)
+
+
+def quiz_percent(score, total_questions):
+    # Integer percent, the same as the SQL used by rebuild()
+    return score * 100 // total_questions if total_questions else None
+
+
+# ---------- Reading ----------
+def get_progress(user_id):
+    """The student's rows, one per hazard they have activity for (primary key read)."""
+    return (
+        StudentProgress.query
+        .filter_by(user_id=user_id)
+        .order_by(StudentProgress.hazard_type)
+        .all()
+    )
+
+
+def summarize(rows):
+    """Totals across hazards for the page header."""
+    quiz_scores = sum(row.quiz_score_total for row in rows)
+    quiz_questions = sum(row.quiz_question_total for row in rows)
+    return {
+        "quiz_attempts": sum(row.quiz_attempts for row in rows),
+        "drills_completed": sum(row.drills_completed for row in rows),
+        "badges": sum(row.badges for row in rows),
+        "quiz_average_percent": quiz_percent(quiz_scores, quiz_questions),
+        "last_attempted_at": max((row.last_attempted_at for row in rows if row.last_attempted_at),
+                                 default=None),
+    }
+
+
+# ---------- Incremental updates ----------
+def _bump(user_id, hazard_type, best_percent=None, last_attempted_at=None, **increments):
+    """Add ``increments`` to one progress row in the current transaction, creating it if needed."""
+    values = {name: getattr(StudentProgress, name) + amount for name, amount in increments.items()}
+    if best_percent is not None:
+        column = StudentProgress.quiz_best_percent
+        values["quiz_best_percent"] = case((column >= best_percent, column), else_=best_percent)
+    if last_attempted_at is not None:
+        column = StudentProgress.last_attempted_at
+        values["last_attempted_at"] = case((column >= last_attempted_at, column), else_=last_attempted_at)
+
+    row = {name: 0 for name in COUNTERS}
+    row.update(increments)
+    dialect = db.session.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        # One statement whether or not the row exists yet
+        dialect_insert = importlib.import_module(f"sqlalchemy.dialects.{dialect}").insert
+        db.session.execute(
+            dialect_insert(StudentProgress)
+            .values(user_id=user_id, hazard_type=hazard_type, quiz_best_percent=best_percent,
+                    last_attempted_at=last_attempted_at, **row)
+            .on_conflict_do_update(index_elements=["user_id", "hazard_type"], set_=values)
+        )
+        return
+
+    statement = (
+        update(StudentProgress)
+        .where(StudentProgress.user_id == user_id, StudentProgress.hazard_type == hazard_type)
+        .values(**values)
+    )
+    if db.session.execute(statement).rowcount:
+        return
+
+    try:
+        with db.session.begin_nested():
+            db.session.execute(insert(StudentProgress).values(
+                user_id=user_id, hazard_type=hazard_type, quiz_best_percent=best_percent,
+                last_attempted_at=last_attempted_at, **row
+            ))
+    except IntegrityError:
+        # Another request created the row first
+        db.session.execute(statement)
+
+
+def record_quiz_attempts(user_id, rows):
+    """Fold newly inserted QuizAttempt row values into the student's progress.
+
+    One UPDATE (or INSERT) per hazard in the batch; the caller commits.
+    """
+    by_hazard = defaultdict(list)
+    for row in rows:
+        by_hazard[row["hazard_type"]].append(row)
+
+    for hazard_type, attempts in by_hazard.items():
+        percents = [quiz_percent(a["score"], a["total_questions"]) for a in attempts]
+        _bump(
+            user_id, hazard_type,
+            best_percent=max((p for p in percents if p is not None), default=None),
+            last_attempted_at=max(a["attempted_at"] for a in attempts),
+            quiz_attempts=len(attempts),
+            quiz_score_total=sum(a["score"] for a in attempts),
+            quiz_question_total=sum(a["total_questions"] or 0 for a in attempts),
+        )
+
+
+def record_drill(user_id, hazard_type, completed_at, first_completion, score_delta, badge_added):
+    """Fold a drill submission (new or repeated) into the student's progress; the caller commits."""
+    _bump(
+        user_id, hazard_type,
+        last_attempted_at=completed_at,
+        drills_completed=int(first_completion),
+        drill_score_total=score_delta,
+        badges=int(badge_added),
+    )
+
+
+# ---------- Rebuild ----------
+def _aggregate_query(user_id=None):
+    # Each table has its own hazard enum type. PostgreSQL neither UNIONs nor
+    # implicitly converts between them, so both branches go through text and
+    # the result is cast to the progress enum for the INSERT ... SELECT.
+    quiz_percent_sql = case(
+        (QuizAttempt.total_questions > 0, QuizAttempt.score * 100 // QuizAttempt.total_questions),
+        else_=None,
+    )
+    quizzes = (
+        select(
+            QuizAttempt.user_id.label("user_id"),
+            cast(QuizAttempt.hazard_type, String).label("hazard_type"),
+            func.count().label("quiz_attempts"),
+            func.max(quiz_percent_sql).label("quiz_best_percent"),
+            func.coalesce(func.sum(QuizAttempt.score), 0).label("quiz_score_total"),
+            func.coalesce(func.sum(QuizAttempt.total_questions), 0).label("quiz_question_total"),
+            literal(0).label("drills_completed"),
+            literal(0).label("drill_score_total"),
+            literal(0).label("badges"),
+            func.max(QuizAttempt.attempted_at).label("last_attempted_at"),
+        )
+        .where(QuizAttempt.user_id.isnot(None))
+        .group_by(QuizAttempt.user_id, QuizAttempt.hazard_type)
+    )
+    drills = (
+        select(
+            DrillParticipation.user_id.label("user_id"),
+            cast(Drill.hazard_type, String).label("hazard_type"),
+            literal(0).label("quiz_attempts"),
+            literal(None).label("quiz_best_percent"),
+            literal(0).label("quiz_score_total"),
+            literal(0).label("quiz_question_total"),
+            func.count().label("drills_completed"),
+            func.coalesce(func.sum(DrillParticipation.score), 0).label("drill_score_total"),
+            func.count(DrillParticipation.badge_id).label("badges"),
+            func.max(DrillParticipation.completed_at).label("last_attempted_at"),
+        )
+        .join(Drill, Drill.drill_id == DrillParticipation.drill_id)
+        .where(DrillParticipation.user_id.isnot(None))
+        .group_by(DrillParticipation.user_id, Drill.hazard_type)
+    )
+    if user_id is not None:
+        quizzes = quizzes.where(QuizAttempt.user_id == user_id)
+        drills = drills.where(DrillParticipation.user_id == user_id)
+
+    combined = union_all(quizzes, drills).subquery()
+    columns = ["user_id", "hazard_type", *COUNTERS, "quiz_best_percent", "last_attempted_at"]
+    aggregates = [
+        func.sum(combined.c[name]) if name in COUNTERS else func.max(combined.c[name])
+        for name in columns[2:]
+    ]
+    query = (
+        select(
+            combined.c.user_id,
+            cast(combined.c.hazard_type, StudentProgress.hazard_type.type).label("hazard_type"),
+            *aggregates,
+        )
+        .group_by(combined.c.user_id, combined.c.hazard_type)
+    )
+    return columns, query
+
+
+def rebuild(user_id=None, bind=None):
+    """Recompute progress from the raw QuizAttempt and DrillParticipation rows.
+
+    Two GROUP BY queries feed a single INSERT ... SELECT. Pass ``bind`` to
+    run inside an existing connection (schema migrations); otherwise the
+    session is used and committed. Returns the number of progress rows.
+    """
+    executor = db.session if bind is None else bind
+    clear = delete(StudentProgress)
+    if user_id is not None:
+        clear = clear.where(StudentProgress.user_id == user_id)
+    executor.execute(clear)
+
+    columns, query = _aggregate_query(user_id)
+    executor.execute(insert(StudentProgress).from_select(columns, query))
+
+    count = select(func.count()).select_from(StudentProgress)
+    if user_id is not None:
+        count = count.where(StudentProgress.user_id == user_id)
+    total = executor.execute(count).scalar()
+    if bind is None:
+        db.session.commit()
+    return total
@@ -0,0 +1,87 @@
+# app/services/providers.py
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class ProviderRegistry:
+    """Builds heavy third-party clients on first use instead of at import time.
+
+    Factories are registered by name and called at most once per process;
+    ``override`` swaps in a stub (tests, offline benchmarks).
+    """
+
+    def __init__(self):
+        self._factories = {}
+        self._instances = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, factory):
+        self._factories[name] = factory
+
+    def get(self, name):
+        try:
+            return self._instances[name]
+        except KeyError:
+            pass
+        with self._lock:
+            if name not in self._instances:
+                start = time.perf_counter()
+                self._instances[name] = self._factories[name]()
+                logger.info(f"Initialised provider '{name}' in {time.perf_counter() - start:.2f}s")
+            return self._instances[name]
+
+    def override(self, name, instance):
+        with self._lock:
+            self._instances[name] = instance
+
+    def reset(self, name=None):
+        with self._lock:
+            if name is None:
+                self._instances.clear()
+            else:
+                self._instances.pop(name, None)
+
+    def loaded(self):
+        return sorted(self._instances)
+
+
+providers = ProviderRegistry()
+
+
+# ---------- Factories ----------
+def _groq_client():
+    from groq import Groq
+    return Groq(api_key=os.getenv("GROQ_API_KEY"))
+
+
+def _youtube_dl():
+    # The downloader class, used as ``providers.get("yt_dlp")(options)``
+    import yt_dlp
+    return yt_dlp.YoutubeDL
+
+
+def _youtube_transcripts():
+    import youtube_transcript_api
+    return youtube_transcript_api
+
+
+def _pypdf():
+    import PyPDF2
+    return PyPDF2
+
+
+def _redis():
+    # Only needed when RATE_LIMIT_BACKEND is "redis"
+    import redis
+    return redis.Redis.from_url(os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+
+
+providers.register("groq", _groq_client)
+providers.register("yt_dlp", _youtube_dl)
+providers.register("youtube_transcript_api", _youtube_transcripts)
+providers.register("pypdf", _pypdf)
+providers.register("redis", _redis)
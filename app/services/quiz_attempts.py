@@ -0,0 +1,151 @@
+# app/services/quiz_attempts.py
+import importlib
+from datetime import datetime, timezone
+from sqlalchemy import insert, select
+from app import db
+from app.models import QuizAttempt
+from app.services import progress
+
+HAZARD_TYPES = QuizAttempt.__table__.c.hazard_type.type.enums
+
+# Largest offline backlog accepted in one request
+MAX_BATCH = 200
+MAX_ATTEMPT_ID_LENGTH = 64
+
+
+class AttemptError(ValueError):
+    pass
+
+
+# ---------- Validation ----------
+def _parse_time(value, now):
+    if value in (None, ""):
+        return now
+    try:
+        parsed = datetime.fromisoformat(str(value))
+    except ValueError:
+        raise AttemptError("attempted_at must be an ISO 8601 timestamp")
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    # Client clocks run ahead; an attempt cannot be from the future
+    return min(parsed, now)
+
+
+def _as_int(payload, field, minimum=0):
+    value = payload.get(field)
+    if isinstance(value, bool) or not isinstance(value, int) or value < minimum:
+        raise AttemptError(f"{field} must be an integer >= {minimum}")
+    return value
+
+
+def parse_attempt(payload, user_id, now):
+    """Validate one attempt from the browser and return its QuizAttempt row values."""
+    if not isinstance(payload, dict):
+        raise AttemptError("attempt must be an object")
+
+    client_attempt_id = payload.get("attempt_id")
+    if not isinstance(client_attempt_id, str) or not client_attempt_id.strip():
+        raise AttemptError("attempt_id is required")
+    if len(client_attempt_id) > MAX_ATTEMPT_ID_LENGTH:
+        raise AttemptError(f"attempt_id is longer than {MAX_ATTEMPT_ID_LENGTH} characters")
+
+    hazard_type = payload.get("hazard_type")
+    if hazard_type not in HAZARD_TYPES:
+        raise AttemptError(f"hazard_type must be one of {', '.join(HAZARD_TYPES)}")
+
+    total_questions = _as_int(payload, "total_questions", minimum=1)
+    score = _as_int(payload, "score")
+    if score > total_questions:
+        raise AttemptError("score cannot exceed total_questions")
+
+    return {
+        "user_id": user_id,
+        "client_attempt_id": client_attempt_id,
+        "hazard_type": hazard_type,
+        "score": score,
+        "total_questions": total_questions,
+        "attempted_at": _parse_time(payload.get("attempted_at"), now),
+    }
+
+
+# ---------- Ingestion ----------
+def _insert_ignoring_duplicates(rows):
+    """One executemany INSERT that skips attempt ids the student already stored.
+
+    Returns the set of client attempt ids actually inserted, or None when
+    the database cannot say (no RETURNING and a short rowcount).
+    """
+    table = QuizAttempt.__table__
+    dialect = db.session.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        dialect_insert = importlib.import_module(f"sqlalchemy.dialects.{dialect}").insert
+        statement = (
+            dialect_insert(table)
+            .on_conflict_do_nothing(index_elements=["user_id", "client_attempt_id"])
+            .returning(table.c.client_attempt_id)
+        )
+        return set(db.session.execute(statement, rows).scalars())
+    if dialect in ("mysql", "mariadb"):
+        statement = insert(table).prefix_with("IGNORE")
+    else:
+        statement = insert(table)
+    if db.session.execute(statement, rows).rowcount == len(rows):
+        return {row["client_attempt_id"] for row in rows}
+    return None
+
+
+def ingest_attempts(user_id, payloads, _retry=True):
+    """Store a batch of client-scored quiz attempts for ``user_id``.
+
+    The attempts take two statements whatever the batch size: one lookup of
+    the student's attempt ids already stored and one bulk insert of the rest.
+    Re-sending an attempt is harmless; it is reported under ``duplicates``.
+    The student's progress rows (one per hazard) are updated in the same
+    commit, from the rows the insert reports as actually stored.
+    Returns ``{"accepted": [...], "duplicates": [...], "rejected": [...]}``.
+    """
+    if len(payloads) > MAX_BATCH:
+        raise AttemptError(f"At most {MAX_BATCH} attempts per request")
+
+    now = datetime.utcnow()
+    rows = {}
+    rejected = []
+    for payload in payloads:
+        try:
+            row = parse_attempt(payload, user_id, now)
+        except AttemptError as e:
+            attempt_id = payload.get("attempt_id") if isinstance(payload, dict) else None
+            rejected.append({"attempt_id": attempt_id, "error": str(e)})
+            continue
+        rows.setdefault(row["client_attempt_id"], row)
+
+    stored = set()
+    if rows:
+        stored = set(db.session.execute(
+            select(QuizAttempt.client_attempt_id)
+            .where(QuizAttempt.user_id == user_id, QuizAttempt.client_attempt_id.in_(list(rows)))
+        ).scalars())
+
+    new_rows = [row for attempt_id, row in rows.items() if attempt_id not in stored]
+    accepted = []
+    if new_rows:
+        inserted = _insert_ignoring_duplicates(new_rows)
+        if inserted is None:
+            # Some rows were skipped and the database cannot say which
+            db.session.rollback()
+            if _retry:
+                return ingest_attempts(user_id, payloads, _retry=False)
+            # Still ambiguous: store nothing; the client keeps the batch and resends it
+            return {"accepted": [], "duplicates": sorted(stored), "rejected": rejected}
+        # A concurrent upload may have stored some of these since the
+        # lookup; they are duplicates, and progress counts only our rows
+        accepted = [row for row in new_rows if row["client_attempt_id"] in inserted]
+        stored.update(row["client_attempt_id"] for row in new_rows if row["client_attempt_id"] not in inserted)
+        progress.record_quiz_attempts(user_id, accepted)
+        db.session.commit()
+
+    return {
+        "accepted": [row["client_attempt_id"] for row in accepted],
+        "duplicates": sorted(stored),
+        "rejected": rejected,
+    }
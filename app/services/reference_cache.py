@@ -0,0 +1,166 @@
+# app/services/reference_cache.py
+import threading
+import time
+from types import SimpleNamespace
+from sqlalchemy import event, inspect
+from app.models import Badge, Institute, Module
+from app.services.db_routing import on_primary
+
+
+class TTLCache:
+    """Small thread-safe in-process cache with per-entry TTL and hit/miss counters.
+
+    Loaders run outside the lock. An invalidation that lands while a key is
+    loading bumps that key's generation, and the load's result is then
+    returned but not stored: it may have been read before the write.
+    """
+
+    def __init__(self, ttl=300):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = {}
+        # key -> loads in progress, and key -> generation, for keys being loaded only
+        self._loading = {}
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    def get_or_load(self, key, loader, cache_none=True):
+        """Cached value for ``key``, calling ``loader()`` on a miss.
+
+        With ``cache_none=False`` a None result is returned but not stored,
+        so the next lookup asks again.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] > now:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            generation = self._generations.get(key, 0)
+            self._loading[key] = self._loading.get(key, 0) + 1
+
+        try:
+            # Invalidation follows a write, so reload from the primary; a lagging
+            # replica would put the old value back for a whole TTL
+            with on_primary():
+                value = loader()
+        except BaseException:
+            with self._lock:
+                self._finish_load(key)
+            raise
+        with self._lock:
+            stale = self._generations.get(key, 0) != generation
+            self._finish_load(key)
+            if not stale and (value is not None or cache_none):
+                self._data[key] = (now + self.ttl, value)
+        return value
+
+    def _finish_load(self, key):
+        self._loading[key] -= 1
+        if not self._loading[key]:
+            del self._loading[key]
+            self._generations.pop(key, None)
+
+    def _bump(self, keys):
+        # Loads of these keys that are in progress must not store their result
+        for key in keys:
+            self._generations[key] = self._generations.get(key, 0) + 1
+
+    def discard(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+            if key in self._loading:
+                self._bump([key])
+
+    def invalidate(self, prefix=None):
+        """Drop every entry, or only those whose key tuple starts with ``prefix``."""
+        with self._lock:
+            if prefix is None:
+                self._data.clear()
+                self._bump(list(self._loading))
+                return
+            for key in [k for k in self._data if k[0] == prefix]:
+                del self._data[key]
+            self._bump([k for k in self._loading if k[0] == prefix])
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+
+# Rows are cached as plain snapshots rather than ORM instances so they can
+# be shared across requests and threads without being bound to a session.
+def snapshot(obj):
+    if obj is None:
+        return None
+    values = {attr.key: getattr(obj, attr.key) for attr in inspect(obj).mapper.column_attrs}
+    return SimpleNamespace(**values)
+
+
+reference_cache = TTLCache(ttl=300)
+
+
+# ---------- Badges ----------
+def get_badges():
+    """All badges keyed by name."""
+    return reference_cache.get_or_load(
+        ("badges", "all"),
+        lambda: {b.name: snapshot(b) for b in Badge.query.all()},
+    )
+
+
+def get_badge(name):
+    return get_badges().get(name)
+
+
+def get_badges_by_id():
+    return {b.badge_id: b for b in get_badges().values()}
+
+
+# ---------- Institutes ----------
+def get_institute(institute_id):
+    """Institute snapshot by id, or None. Accepts the string ids used as teacher codes.
+
+    Unknown ids are not cached: an institute just created by another
+    worker must be accepted at registration and login right away.
+    """
+    try:
+        institute_id = int(institute_id)
+    except (TypeError, ValueError):
+        return None
+    return reference_cache.get_or_load(
+        ("institutes", institute_id),
+        lambda: snapshot(Institute.query.get(institute_id)),
+        cache_none=False,
+    )
+
+
+# ---------- Modules ----------
+def latest_modules(limit=3):
+    return reference_cache.get_or_load(
+        ("modules", "latest", limit),
+        lambda: [snapshot(m) for m in
+                 Module.query.order_by(Module.created_at.desc()).limit(limit).all()],
+    )
+
+
+# ---------- Invalidation ----------
+def _listen_for_writes(model, prefix):
+    def invalidate(mapper, connection, target):
+        reference_cache.invalidate(prefix)
+
+    for name in ("after_insert", "after_update", "after_delete"):
+        event.listen(model, name, invalidate)
+
+
+_listen_for_writes(Badge, "badges")
+_listen_for_writes(Institute, "institutes")
+_listen_for_writes(Module, "modules")
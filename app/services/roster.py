@@ -0,0 +1,257 @@
+# app/services/roster.py
+import csv
+import io
+import logging
+import os
+import re
+import secrets
+import string
+from concurrent.futures import ProcessPoolExecutor
+from sqlalchemy import insert, select
+from sqlalchemy.exc import DataError, IntegrityError
+from werkzeug.security import generate_password_hash
+from app import db
+from app.forms import PASSWORD_RULE, password_is_strong
+from app.models import User, Student
+
+logger = logging.getLogger(__name__)
+
+# Rows per insert transaction, and emails per IN (...) lookup
+CHUNK_SIZE = 500
+HASH_WORKERS = os.cpu_count() or 1
+# Passwords given in an uploaded roster are hashed during the upload so
+# they never reach the job store; beyond this many the upload is refused
+MAX_SUPPLIED_PASSWORDS = 50
+
+REQUIRED_COLUMNS = ("first_name", "last_name", "email", "student_class", "roll_no")
+REPORT_COLUMNS = ("line", "email", "status", "error", "password")
+
+# Column sizes, so an over-long value is a row error rather than a failed insert
+MAX_LENGTHS = {
+    "email": User.__table__.c.email.type.length,
+    "student_class": Student.__table__.c.student_class.type.length,
+    "roll_no": Student.__table__.c.roll_no.type.length,
+}
+
+_EMAIL = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+_PHONE = re.compile(r"^(?:\+91)?[6-9]\d{9}$")
+
+
+class RosterError(ValueError):
+    pass
+
+
+# ---------- Parsing and validation ----------
+def read_roster(text):
+    """Parse roster CSV text into (line number, row dict) pairs."""
+    reader = csv.DictReader(io.StringIO(text))
+    headers = {h.strip().lower() for h in (reader.fieldnames or [])}
+    missing = [c for c in REQUIRED_COLUMNS if c not in headers]
+    if missing:
+        raise RosterError(f"Roster is missing columns: {', '.join(missing)}")
+    return [
+        (line, {(k or "").strip().lower(): (v or "").strip() for k, v in row.items()})
+        for line, row in enumerate(reader, start=2)
+    ]
+
+
+def generate_password():
+    """A random password that passes the registration form's rules."""
+    alphabet = string.ascii_letters + string.digits
+    chars = [secrets.choice(string.ascii_uppercase), secrets.choice(string.ascii_lowercase),
+             secrets.choice(string.digits), secrets.choice("!@#$%^&*")]
+    chars += [secrets.choice(alphabet) for _ in range(8)]
+    secrets.SystemRandom().shuffle(chars)
+    return "".join(chars)
+
+
+def validate_row(row):
+    """Return an error message for the row, or None."""
+    for name in ("first_name", "last_name"):
+        if not 2 <= len(row.get(name, "")) <= 100:
+            return f"{name} must be 2-100 characters"
+    if not _EMAIL.match(row.get("email", "")):
+        return "invalid email"
+    if row.get("phone") and not _PHONE.match(row["phone"]):
+        return "invalid phone number"
+    if not row.get("student_class"):
+        return "student_class is required"
+    if not row.get("roll_no"):
+        return "roll_no is required"
+    for name, length in MAX_LENGTHS.items():
+        if len(row[name]) > length:
+            return f"{name} must be at most {length} characters"
+    if row.get("password") and not _strong_password(row["password"]):
+        return PASSWORD_RULE
+    if row.get("weak_password"):
+        return PASSWORD_RULE
+    return None
+
+
+def _strong_password(password):
+    return len(password) >= 8 and password_is_strong(password)
+
+
+def existing_emails(emails):
+    """Which of ``emails`` are already registered; one query per CHUNK_SIZE emails."""
+    emails = list(emails)
+    found = set()
+    for start in range(0, len(emails), CHUNK_SIZE):
+        found.update(db.session.execute(
+            select(User.email).where(User.email.in_(emails[start:start + CHUNK_SIZE]))
+        ).scalars())
+    return found
+
+
+# ---------- Hashing ----------
+def hash_passwords(passwords, workers=HASH_WORKERS):
+    """Hash passwords on a process pool; each hash is deliberately slow."""
+    if workers <= 1 or len(passwords) < 2:
+        return [generate_password_hash(p) for p in passwords]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        chunksize = max(1, len(passwords) // (workers * 4))
+        return list(pool.map(generate_password_hash, passwords, chunksize=chunksize))
+
+
+def hash_supplied_passwords(rows):
+    """Swap each row's plaintext ``password`` for its ``password_hash``, in place.
+
+    Used before queueing an import so the job payload holds no plaintext
+    passwords. Weak passwords are dropped and flagged for validate_row.
+    Raises RosterError when more than MAX_SUPPLIED_PASSWORDS rows have one.
+    """
+    supplied = [row for _, row in rows if row.get("password")]
+    if len(supplied) > MAX_SUPPLIED_PASSWORDS:
+        raise RosterError(f"At most {MAX_SUPPLIED_PASSWORDS} rows may set a password; "
+                          "leave the password column empty to have passwords generated")
+    for row in supplied:
+        password = row.pop("password")
+        if _strong_password(password):
+            row["password_hash"] = generate_password_hash(password)
+        else:
+            row["weak_password"] = True
+    return rows
+
+
+# ---------- Import ----------
+def _insert_chunk(chunk, institute_id):
+    users = [
+        {
+            "first_name": row["first_name"],
+            "last_name": row["last_name"],
+            "email": row["email"],
+            "phone": row.get("phone") or None,
+            "role": "student",
+            "institute_id": institute_id,
+            "password_hash": row["password_hash"],
+        }
+        for _, row in chunk
+    ]
+    db.session.execute(insert(User), users)
+    ids = dict(db.session.execute(
+        select(User.email, User.id).where(User.email.in_([row["email"] for _, row in chunk]))
+    ).all())
+    db.session.execute(insert(Student), [
+        {"user_id": ids[row["email"]], "student_class": row["student_class"], "roll_no": row["roll_no"]}
+        for _, row in chunk
+    ])
+    db.session.commit()
+
+
+def _insert_rows(rows, institute_id, report):
+    """Insert ``rows`` one at a time after a failed chunk; return those that were saved."""
+    saved = []
+    for line, row in rows:
+        try:
+            _insert_chunk([(line, row)], institute_id)
+        except (IntegrityError, DataError) as e:
+            db.session.rollback()
+            logger.warning(f"Roster row {line} could not be saved: {e.orig}")
+            error = "email already registered" if existing_emails([row["email"]]) else "could not be saved"
+            report[line] = {"line": line, "email": row["email"], "status": "error", "error": error}
+        else:
+            saved.append((line, row))
+    return saved
+
+
+def import_roster(rows, institute_id, workers=HASH_WORKERS, on_progress=None):
+    """Create student accounts for ``rows`` (from read_roster) in ``institute_id``.
+
+    Rows are validated first and emails are checked against existing users
+    in bulk. Then, CHUNK_SIZE rows at a time, passwords are hashed (in
+    parallel with ``workers`` > 1) and the users plus their student
+    profiles are inserted in one transaction; ``on_progress(done, total)``
+    is called after each chunk. Rows without a password get a generated
+    one, returned in the report. Rows that already carry a
+    ``password_hash`` (see hash_supplied_passwords) are not hashed again.
+    Returns one report dict per input row, in input order.
+    """
+    report = {}
+    valid = []
+    seen = set()
+    for line, row in rows:
+        error = validate_row(row)
+        if error is None and row["email"] in seen:
+            error = "duplicate email in roster"
+        if error:
+            report[line] = {"line": line, "email": row.get("email"), "status": "error", "error": error}
+            continue
+        seen.add(row["email"])
+        valid.append((line, row))
+
+    taken = existing_emails(seen)
+    pending = []
+    for line, row in valid:
+        if row["email"] in taken:
+            report[line] = {"line": line, "email": row["email"], "status": "error",
+                            "error": "email already registered"}
+        else:
+            pending.append((line, row))
+
+    generated = {}
+    for line, row in pending:
+        if not row.get("password") and not row.get("password_hash"):
+            row["password"] = generated[line] = generate_password()
+
+    for start in range(0, len(pending), CHUNK_SIZE):
+        chunk = pending[start:start + CHUNK_SIZE]
+        unhashed = [row for _, row in chunk if not row.get("password_hash")]
+        hashes = hash_passwords([row["password"] for row in unhashed], workers)
+        for row, password_hash in zip(unhashed, hashes):
+            row["password_hash"] = password_hash
+        try:
+            _insert_chunk(chunk, institute_id)
+        except (IntegrityError, DataError):
+            # Usually someone registered one of these emails since the lookup;
+            # anything else is narrowed down to the failing rows
+            db.session.rollback()
+            taken = existing_emails(row["email"] for _, row in chunk)
+            for line, row in chunk:
+                if row["email"] in taken:
+                    report[line] = {"line": line, "email": row["email"], "status": "error",
+                                    "error": "email already registered"}
+            chunk = _insert_rows(
+                [(line, row) for line, row in chunk if row["email"] not in taken], institute_id, report
+            )
+        for line, row in chunk:
+            report[line] = {"line": line, "email": row["email"], "status": "created",
+                            "password": generated.get(line)}
+        if on_progress is not None:
+            on_progress(min(start + CHUNK_SIZE, len(pending)), len(pending))
+
+    logger.info(f"Roster import for institute {institute_id}: "
+                f"{sum(r['status'] == 'created' for r in report.values())} of {len(rows)} created")
+    return [report[line] for line, _ in rows]
+
+
+def without_passwords(report):
+    """The report with generated passwords removed, once they have been handed out."""
+    return [{**entry, "password": None} for entry in report]
+
+
+def report_csv(report):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=REPORT_COLUMNS, extrasaction="ignore")
+    writer.writeheader()
+    writer.writerows(report)
+    return buffer.getvalue()
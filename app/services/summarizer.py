@@ -0,0 +1,231 @@
+# app/services/summarizer.py
+import os
+import tempfile
+import logging
+from dotenv import load_dotenv
+from app.services.providers import providers
+from app.services.pdf_text import extract_text_from_pdf
+from app.services.chunked_summary import ChunkedSummarizer
+from app.services.content_cache import content_cache, sha256_hex, transcript_key, pdf_text_key, summary_key
+from app.services.metrics import external_call
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+# The Groq client, yt-dlp and the transcript API are built lazily through
+# the provider registry ("groq", "yt_dlp", "youtube_transcript_api")
+
+# Bump whenever the summary prompts change so cached summaries are not reused
+PROMPT_VERSION = 2
+
+# Groq has token limits, so long text is summarised in chunks of CHUNK_TOKENS
+# (map) and then combined (reduce). MAX_INPUT_CHARS caps the total work.
+CHUNK_TOKENS = 2500
+SUMMARY_WORKERS = 4
+MAX_INPUT_CHARS = 200000
+
+# ---------- PDF Text Extraction ----------
+def get_pdf_text(pdf_bytes, max_chars=None):
+    """PDF text for an upload, cached by the SHA-256 of the file.
+
+    Extraction stops once ``max_chars`` characters (default: what the
+    summariser will read) have been gathered.
+    """
+    max_chars = max_chars or MAX_INPUT_CHARS
+    key = pdf_text_key(sha256_hex(pdf_bytes), max_chars)
+    return content_cache.get_or_set(key, lambda: extract_text_from_pdf(pdf_bytes, max_chars))
+
+# ---------- Helper: Extract video ID ----------
+def get_video_id(url):
+    try:
+        if "youtu.be" in url:
+            return url.split("/")[-1].split("?")[0]
+        elif "youtube.com" in url:
+            if "v=" in url:
+                return url.split("v=")[-1].split("&")[0]
+            elif "youtu.be" in url:
+                return url.split("/")[-1]
+        return None
+    except Exception as e:
+        logger.error(f"Error extracting video ID: {e}")
+        return None
+
+# ---------- Step 1: Try Captions ----------
+def get_transcript(video_id):
+    transcript_api = providers.get("youtube_transcript_api")
+    try:
+        logger.info(f"Attempting to get transcript for video ID: {video_id}")
+        with external_call("youtube_transcript"):
+            transcript = transcript_api.YouTubeTranscriptApi.get_transcript(video_id)
+        text = " ".join([t["text"] for t in transcript])
+        logger.info(f"Successfully retrieved transcript with {len(text)} characters")
+        return text
+    except transcript_api.TranscriptsDisabled:
+        logger.warning("Transcripts disabled for this video")
+        return None
+    except Exception as e:
+        logger.error(f"Error getting transcript: {e}")
+        return None
+
+def transcribe_with_whisper(video_url):
+    try:
+        logger.info("Starting Whisper transcription")
+        # Create a temp directory
+        with tempfile.TemporaryDirectory() as temp_dir:
+            temp_audio_path = os.path.join(temp_dir, "audio.%(ext)s")
+
+            # Download audio with yt-dlp
+            ydl_opts = {
+                'format': 'bestaudio/best',
+                'outtmpl': temp_audio_path,
+                'quiet': False,
+                'postprocessors': [{
+                    'key': 'FFmpegExtractAudio',
+                    'preferredcodec': 'mp3',
+                    'preferredquality': '192',
+                }],
+            }
+            
+            logger.info("Downloading audio...")
+            with external_call("yt_dlp"), providers.get("yt_dlp")(ydl_opts) as ydl:
+                ydl.download([video_url])
+
+            # Find the downloaded mp3 file
+            mp3_file = os.path.join(temp_dir, "audio.mp3")
+            
+            if not os.path.exists(mp3_file):
+                # Try to find the actual file name
+                files = os.listdir(temp_dir)
+                mp3_files = [f for f in files if f.endswith('.mp3')]
+                if mp3_files:
+                    mp3_file = os.path.join(temp_dir, mp3_files[0])
+                else:
+                    raise FileNotFoundError("No MP3 file found after download")
+
+            logger.info(f"Audio file found: {mp3_file}")
+
+            # Transcribe with Groq Whisper
+            logger.info("Transcribing with Whisper...")
+            with open(mp3_file, "rb") as audio_file, external_call("groq_whisper"):
+                transcript = providers.get("groq").audio.transcriptions.create(
+                    model="whisper-large-v3",
+                    file=audio_file
+                )
+
+            logger.info("Whisper transcription completed successfully")
+            return transcript.text
+            
+    except Exception as e:
+        logger.error(f"Error in Whisper transcription: {e}")
+        raise
+
+class GroqLLM:
+    """Adapter giving the Groq chat API the ``complete()`` interface the chunked summariser expects."""
+
+    def __init__(self, client=None, model="llama-3.3-70b-versatile", temperature=0.3):
+        self.client = client
+        self.model = model
+        self.temperature = temperature
+
+    def complete(self, system_prompt, user_prompt, max_tokens):
+        with external_call("groq"):
+            completion = (self.client or providers.get("groq")).chat.completions.create(
+                model=self.model,
+                messages=[
+                    {
+                        "role": "system", 
+                        "content": system_prompt
+                    },
+                    {
+                        "role": "user", 
+                        "content": user_prompt
+                    }
+                ],
+                max_tokens=max_tokens,
+                temperature=self.temperature
+            )
+        return completion.choices[0].message.content
+
+
+def summarize_with_groq(text, content_type="video", llm=None):
+    key = summary_key(text, content_type, PROMPT_VERSION)
+    cached = content_cache.get(key)
+    if cached is not None:
+        logger.info(f"Using cached {content_type} summary")
+        return cached
+
+    try:
+        logger.info(f"Summarizing {content_type} text with {len(text)} characters")
+        
+        # Long inputs are summarised in chunks; only the overall cap truncates
+        if len(text) > MAX_INPUT_CHARS:
+            text = text[:MAX_INPUT_CHARS]
+            logger.warning("Text truncated for summarization")
+        
+        # Different system prompts based on content type
+        if content_type == "pdf":
+            system_prompt = "You are a helpful assistant that summarizes PDF documents for students and professionals. Provide clear, concise summaries in simple language, highlighting key points and main ideas. Use clear formatting with headings and bullet points but avoid Markdown syntax."
+        else:
+            system_prompt = "You are a helpful assistant that summarizes video transcripts for students. Provide clear, concise summaries in simple language. Use clear formatting with headings and bullet points but avoid Markdown syntax."
+        
+        summarizer = ChunkedSummarizer(
+            llm or GroqLLM(),
+            chunk_tokens=CHUNK_TOKENS,
+            max_workers=SUMMARY_WORKERS
+        )
+        summary, timings = summarizer.summarize(text, system_prompt, content_type)
+        stages = ", ".join(f"{name}={value:.2f}s" for name, value in timings.items() if name != "chunks")
+        logger.info(f"Summary generated successfully ({timings['chunks']} chunks; {stages})")
+        
+        # Clean up any Markdown formatting that might have been used
+        summary = summary.replace("**", "").replace("*", "• ").replace("#", "")
+
+        # Only successful summaries are cached; errors fall through below
+        content_cache.set(key, summary)
+        return summary
+        
+    except Exception as e:
+        logger.error(f"Error in summarization: {e}")
+        return f"Error generating summary: {str(e)}"
+
+
+# ---------- Full video pipeline ----------
+def summarize_video_url(video_url, set_stage=None):
+    """Captions (or Whisper fallback) followed by the Llama summary.
+
+    ``set_stage`` is called with the name of each stage as it starts so a
+    background job can report progress.
+    """
+    set_stage = set_stage or (lambda stage: None)
+
+    video_id = get_video_id(video_url)
+    if not video_id:
+        raise ValueError("Invalid YouTube URL")
+
+    transcript_text = content_cache.get(transcript_key(video_id))
+    if not transcript_text:
+        # Try captions first
+        set_stage("transcript")
+        transcript_text = get_transcript(video_id)
+
+        # If no captions, use whisper
+        if not transcript_text:
+            logger.info("No transcript available, using Whisper")
+            set_stage("transcribe")
+            transcript_text = transcribe_with_whisper(video_url)
+
+        if not transcript_text:
+            raise RuntimeError("Could not retrieve or transcribe video content")
+        content_cache.set(transcript_key(video_id), transcript_text)
+
+    set_stage("summarize")
+    return summarize_with_groq(transcript_text, "video")
+
+
+def get_cached_video_summary(video_id):
+    """Summary for a video if both its transcript and summary are cached, else None."""
+    transcript_text = content_cache.get(transcript_key(video_id))
+    if not transcript_text:
+        return None
+    return content_cache.get(summary_key(transcript_text, "video", PROMPT_VERSION))
@@ -0,0 +1,263 @@
+# app/services/throttle.py
+import logging
+import math
+import threading
+import time
+from concurrent.futures import Future
+from functools import wraps
+from flask import jsonify, request
+from flask_login import current_user
+from app.services.providers import providers
+
+logger = logging.getLogger(__name__)
+
+
+def parse_limit(value):
+    """``"10/60"`` -> (capacity 10, refilled over 60 seconds)."""
+    capacity, seconds = str(value).split("/")
+    return int(capacity), float(seconds)
+
+
+# ---------- Token buckets ----------
+class MemoryBuckets:
+    """Token buckets in this process; the stand-in when Redis is not configured."""
+
+    # Full buckets are dropped once there are more than this many
+    prune_above = 10000
+
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def take(self, limits, now=None):
+        """Take one token from every ``(key, capacity, seconds)`` bucket, or from none.
+
+        Returns ``(allowed, retry_after_seconds)``.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            levels = []
+            for key, capacity, seconds in limits:
+                rate = capacity / seconds
+                tokens, updated = self._buckets.get(key, (capacity, now))
+                levels.append((key, min(capacity, tokens + (now - updated) * rate), rate))
+
+            wait = max([(1 - tokens) / rate for _, tokens, rate in levels if tokens < 1], default=0.0)
+            for key, tokens, _ in levels:
+                self._buckets[key] = (tokens - 1 if wait == 0 else tokens, now)
+            if len(self._buckets) > self.prune_above:
+                self._prune(now)
+        return wait == 0, wait
+
+    def _prune(self, now):
+        # A bucket idle long enough to refill completely is the same as no bucket
+        for key in [k for k, (_, updated) in self._buckets.items() if now - updated > 3600]:
+            del self._buckets[key]
+
+
+# Checks and takes every bucket atomically on the Redis server
+_TAKE_SCRIPT = """
+local now = tonumber(ARGV[1])
+local levels = {}
+local wait = 0
+for i = 1, #KEYS do
+    local capacity = tonumber(ARGV[i * 2])
+    local rate = capacity / tonumber(ARGV[i * 2 + 1])
+    local bucket = redis.call('HMGET', KEYS[i], 'tokens', 'updated')
+    local tokens = tonumber(bucket[1]) or capacity
+    local updated = tonumber(bucket[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+    levels[i] = tokens
+    if tokens < 1 then wait = math.max(wait, (1 - tokens) / rate) end
+end
+for i = 1, #KEYS do
+    local tokens = levels[i]
+    if wait == 0 then tokens = tokens - 1 end
+    redis.call('HSET', KEYS[i], 'tokens', tokens, 'updated', now)
+    redis.call('EXPIRE', KEYS[i], math.ceil(tonumber(ARGV[i * 2 + 1])))
+end
+return tostring(wait)
+"""
+
+
+class RedisBuckets:
+    """Token buckets shared by every worker through Redis (``REDIS_URL``)."""
+
+    prefix = "ratelimit:"
+
+    def __init__(self):
+        self._script = None
+
+    def take(self, limits, now=None):
+        if self._script is None:
+            self._script = providers.get("redis").register_script(_TAKE_SCRIPT)
+        now = time.time() if now is None else now
+        args = [now]
+        for _, capacity, seconds in limits:
+            args += [capacity, seconds]
+        wait = float(self._script(keys=[self.prefix + key for key, _, _ in limits], args=args))
+        return wait == 0, wait
+
+
+BACKENDS = {
+    "memory": MemoryBuckets,
+    "redis": RedisBuckets,
+}
+
+
+class RateLimiter:
+    """Per-user and per-institute token buckets for expensive endpoints."""
+
+    def __init__(self):
+        self.backend = MemoryBuckets()
+        self.enabled = True
+        self.user_limit = (10, 60.0)
+        self.institute_limit = (200, 60.0)
+        self.allowed = 0
+        self.denied = 0
+        self._lock = threading.Lock()
+
+    def configure(self, backend, user_limit, institute_limit, enabled=True):
+        self.backend = backend
+        self.user_limit = user_limit
+        self.institute_limit = institute_limit
+        self.enabled = enabled
+
+    def hit(self, scope, user_key, institute_key=None):
+        if not self.enabled:
+            return True, 0.0
+        limits = [(f"{scope}:{user_key}", *self.user_limit)]
+        if institute_key is not None:
+            limits.append((f"{scope}:institute:{institute_key}", *self.institute_limit))
+        try:
+            allowed, wait = self.backend.take(limits)
+        except Exception as e:
+            # A limiter outage should not take the endpoints down with it
+            logger.error(f"Rate limiter unavailable, allowing request: {e}")
+            return True, 0.0
+        with self._lock:
+            if allowed:
+                self.allowed += 1
+            else:
+                self.denied += 1
+        return allowed, wait
+
+
+rate_limiter = RateLimiter()
+
+
+def _request_identity():
+    if current_user.is_authenticated:
+        institute = current_user.institute_id or current_user.teacher_code
+        return f"user:{current_user.id}", institute
+    return f"ip:{request.remote_addr}", None
+
+
+def rate_limited(scope):
+    """Answer 429 with Retry-After once the caller's user or institute bucket is empty."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            allowed, wait = rate_limiter.hit(scope, *_request_identity())
+            if not allowed:
+                retry_after = max(1, math.ceil(wait))
+                message = f"Too many requests. Please try again in {retry_after} seconds."
+                # "response" for the chatbot, "error" for the summariser
+                response = jsonify({"error": message, "response": message,
+                                    "summary": None, "retry_after": retry_after})
+                response.status_code = 429
+                response.headers["Retry-After"] = str(retry_after)
+                return response
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# ---------- Request coalescing ----------
+class SingleFlight:
+    """Run one computation per key at a time; concurrent callers share its result.
+
+    The first caller for a key runs ``func``; callers arriving while it is
+    in flight wait for the same result (or exception) instead of starting
+    their own. Coalescing is per process; across workers the content cache
+    and the job queue's de-duplication cover repeats.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.coalesced = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def do(self, key, func):
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+                self.leaders += 1
+
+        if not leader:
+            start = time.perf_counter()
+            try:
+                return future.result()
+            finally:
+                waited = time.perf_counter() - start
+                with self._lock:
+                    self.coalesced += 1
+                    self.wait_seconds += waited
+                    self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+        try:
+            result = func()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "in_flight": len(self._calls),
+                "leaders": self.leaders,
+                "coalesced": self.coalesced,
+                "average_wait_seconds": self.wait_seconds / self.coalesced if self.coalesced else 0.0,
+                "max_wait_seconds": self.max_wait_seconds,
+            }
+
+
+single_flight = SingleFlight()
+
+
+def stats():
+    """Limiter, coalescing and background queue figures in one dict."""
+    from app.services.jobs import job_queue
+
+    return {
+        "rate_limit": {
+            "backend": type(rate_limiter.backend).__name__,
+            "allowed": rate_limiter.allowed,
+            "denied": rate_limiter.denied,
+        },
+        "single_flight": single_flight.stats(),
+        "jobs": job_queue.stats(),
+    }
+
+
+def init_app(app):
+    backend = app.config.get("RATE_LIMIT_BACKEND", "memory")
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown RATE_LIMIT_BACKEND '{backend}'; expected one of {', '.join(BACKENDS)}")
+    rate_limiter.configure(
+        BACKENDS[backend](),
+        parse_limit(app.config.get("RATE_LIMIT_USER", "10/60")),
+        parse_limit(app.config.get("RATE_LIMIT_INSTITUTE", "200/60")),
+        enabled=app.config.get("RATE_LIMIT_ENABLED", True),
+    )
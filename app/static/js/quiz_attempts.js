@@ -0,0 +1,80 @@
+// Quiz attempt buffer shared by the quiz pages. Attempts are saved to the
+// server; the buffer in localStorage keeps them across network drops and
+// reloads until the server confirms them. Settings come from the script
+// tag: data-url, data-csrf-token and data-batch-size.
+const attemptSettings = document.currentScript.dataset;
+const ATTEMPT_BUFFER_KEY = 'pendingQuizAttempts';
+const ATTEMPT_BATCH_SIZE = parseInt(attemptSettings.batchSize, 10);
+let flushingAttempts = false;
+
+function newAttemptId() {
+    if (window.crypto && crypto.randomUUID) {
+        return crypto.randomUUID();
+    }
+    return Date.now().toString(36) + '-' + Math.random().toString(36).slice(2, 12);
+}
+
+function pendingAttempts() {
+    try {
+        return JSON.parse(localStorage.getItem(ATTEMPT_BUFFER_KEY)) || [];
+    } catch (e) {
+        return [];
+    }
+}
+
+function recordAttempt(hazardType, score, totalQuestions) {
+    const pending = pendingAttempts();
+    pending.push({
+        attempt_id: newAttemptId(),
+        hazard_type: hazardType,
+        score: score,
+        total_questions: totalQuestions,
+        attempted_at: new Date().toISOString()
+    });
+    localStorage.setItem(ATTEMPT_BUFFER_KEY, JSON.stringify(pending));
+    flushAttempts();
+}
+
+async function flushAttempts() {
+    if (flushingAttempts || !pendingAttempts().length || !navigator.onLine) {
+        return;
+    }
+    flushingAttempts = true;
+    try {
+        // The server takes at most ATTEMPT_BATCH_SIZE per request, so a long
+        // offline backlog is sent in slices, each removed once confirmed
+        let pending = pendingAttempts();
+        while (pending.length) {
+            const response = await fetch(attemptSettings.url, {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                    'X-CSRFToken': attemptSettings.csrfToken
+                },
+                body: JSON.stringify({ attempts: pending.slice(0, ATTEMPT_BATCH_SIZE) })
+            });
+            if (response.status === 401 || response.status >= 500) {
+                return;  // keep them for the next try
+            }
+            const result = await response.json();
+            // Rejected attempts would fail again, so they are dropped too
+            const done = new Set([
+                ...(result.accepted || []),
+                ...(result.duplicates || []),
+                ...(result.rejected || []).map(r => r.attempt_id)
+            ]);
+            if (!done.size) {
+                return;  // nothing settled; stop rather than resend the same slice
+            }
+            pending = pendingAttempts().filter(a => !done.has(a.attempt_id));
+            localStorage.setItem(ATTEMPT_BUFFER_KEY, JSON.stringify(pending));
+        }
+    } catch (e) {
+        // Offline or the server is unreachable; retried on the next 'online' event
+    } finally {
+        flushingAttempts = false;
+    }
+}
+
+window.addEventListener('online', flushAttempts);
+window.addEventListener('load', flushAttempts);
@@ -1,18 +1,162 @@
 # config.py
 import os
 from datetime import timedelta
+from dotenv import load_dotenv
+from sqlalchemy.engine import make_url
+
+# Settings below are read from the environment when this module is imported
+load_dotenv()
 
 basedir = os.path.abspath(os.path.dirname(__file__))
 
+
+def _env_int(name, default):
+    return int(os.environ.get(name, default))
+
+
 class Config:
-    SECRET_KEY = os.environ.get('SECRET_KEY') or 'your-secret-key-here-change-in-production'
-    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or \
+    SECRET_KEY = os.environ.get('SECRET_KEY', 'mysecretkey')
+
+    # Primary database (all writes), and an optional read replica that
+    # read-only pages use; see app/services/db_routing.py
+    SQLALCHEMY_DATABASE_URI = os.environ.get('SQLALCHEMY_DATABASE_URI') or os.environ.get('DATABASE_URL') or \
         'sqlite:///' + os.path.join(basedir, 'disaster_platform.db')
+    SQLALCHEMY_REPLICA_URI = os.environ.get('SQLALCHEMY_REPLICA_URI')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
-    
+
+    # Connection pool (ignored for SQLite). Pre-ping replaces connections the
+    # server or a proxy dropped; recycle stays under the server's idle timeout.
+    DB_POOL_SIZE = _env_int('DB_POOL_SIZE', 5)
+    DB_MAX_OVERFLOW = _env_int('DB_MAX_OVERFLOW', 10)
+    DB_POOL_TIMEOUT = _env_int('DB_POOL_TIMEOUT', 30)
+    DB_POOL_RECYCLE = _env_int('DB_POOL_RECYCLE', 1800)
+    DB_POOL_PRE_PING = True
+    # Server-side limit per statement in ms (PostgreSQL, MySQL); 0 = none
+    DB_STATEMENT_TIMEOUT_MS = _env_int('DB_STATEMENT_TIMEOUT_MS', 0)
+    # Seconds SQLite waits for a write lock before "database is locked"
+    DB_SQLITE_BUSY_TIMEOUT = _env_int('DB_SQLITE_BUSY_TIMEOUT', 30)
+
+    # Reverse proxies in front of the app whose X-Forwarded-For/-Proto are
+    # trusted; anonymous callers are rate-limited by the client address
+    TRUSTED_PROXY_HOPS = _env_int('TRUSTED_PROXY_HOPS', 0)
+
     # Session settings
     PERMANENT_SESSION_LIFETIME = timedelta(days=7)
-    
+
     # Upload settings
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
-    UPLOAD_FOLDER = os.path.join(basedir, 'app', 'static', 'uploads')
\ No newline at end of file
+    UPLOAD_FOLDER = os.path.join(basedir, 'app', 'static', 'uploads')
+
+    # Background jobs (video summaries); 0 workers disables the in-process pool
+    JOB_QUEUE_PATH = os.environ.get('JOB_QUEUE_PATH')
+    JOB_WORKERS = _env_int('JOB_WORKERS', 2)
+    # A running job whose worker stops refreshing it for this long is
+    # requeued, up to JOB_MAX_ATTEMPTS runs, then marked failed
+    JOB_LEASE_SECONDS = _env_int('JOB_LEASE_SECONDS', 60)
+    JOB_MAX_ATTEMPTS = _env_int('JOB_MAX_ATTEMPTS', 2)
+    # Finished jobs and their results (summaries, roster reports) are deleted after this
+    JOB_RETENTION_SECONDS = _env_int('JOB_RETENTION_SECONDS', 24 * 3600)
+    # Transcript / PDF text / summary cache shared by all workers on the host
+    CONTENT_CACHE_PATH = os.environ.get('CONTENT_CACHE_PATH')
+    CONTENT_CACHE_MAX_BYTES = _env_int('CONTENT_CACHE_MAX_BYTES', 256 * 1024 * 1024)
+    # Chatbot history: "sql" (app database) or "memory" (per process)
+    CHAT_STORE = os.environ.get('CHAT_STORE', 'sql')
+    CHAT_HISTORY_TOKENS = _env_int('CHAT_HISTORY_TOKENS', 2000)
+    # First-turn chatbot answers are served from seeded or reviewed FAQ
+    # entries above this similarity
+    FAQ_SIMILARITY_THRESHOLD = float(os.environ.get('FAQ_SIMILARITY_THRESHOLD', 0.9))
+    FAQ_CACHE_SIZE = _env_int('FAQ_CACHE_SIZE', 2000)
+    # Language codes the FAQ cache answers in (the first is the default);
+    # chat in any other language always goes to the model
+    FAQ_LANGUAGES = tuple(os.environ.get('FAQ_LANGUAGES', 'en').split(','))
+    # Token buckets for the LLM endpoints, as "requests/seconds"; "redis"
+    # shares them across workers through REDIS_URL
+    RATE_LIMIT_ENABLED = True
+    RATE_LIMIT_BACKEND = os.environ.get('RATE_LIMIT_BACKEND', 'memory')
+    RATE_LIMIT_USER = os.environ.get('RATE_LIMIT_USER', '10/60')
+    RATE_LIMIT_INSTITUTE = os.environ.get('RATE_LIMIT_INSTITUTE', '200/60')
+    # Prometheus /metrics behind a bearer token; with METRICS_REQUIRE_TOKEN
+    # the endpoint is not served until METRICS_TOKEN is set. Requests slower
+    # than SLOW_REQUEST_MS are logged with their heaviest queries (0 = off)
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1') != '0'
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+    METRICS_REQUIRE_TOKEN = False
+    SLOW_REQUEST_MS = _env_int('SLOW_REQUEST_MS', 0)
+
+
+class DevelopmentConfig(Config):
+    DEBUG = True
+    DB_POOL_SIZE = _env_int('DB_POOL_SIZE', 2)
+    DB_MAX_OVERFLOW = _env_int('DB_MAX_OVERFLOW', 2)
+
+
+class ProductionConfig(Config):
+    # Per gunicorn worker: (pool + overflow) x workers must fit the server's max_connections
+    DB_POOL_SIZE = _env_int('DB_POOL_SIZE', 10)
+    DB_MAX_OVERFLOW = _env_int('DB_MAX_OVERFLOW', 20)
+    DB_POOL_RECYCLE = _env_int('DB_POOL_RECYCLE', 900)
+    DB_STATEMENT_TIMEOUT_MS = _env_int('DB_STATEMENT_TIMEOUT_MS', 30000)
+    # The platform router (Procfile deploy) adds one hop
+    TRUSTED_PROXY_HOPS = _env_int('TRUSTED_PROXY_HOPS', 1)
+    # Metrics name endpoints, users' traffic and cache contents
+    METRICS_REQUIRE_TOKEN = True
+
+
+class TestingConfig(Config):
+    TESTING = True
+    WTF_CSRF_ENABLED = False
+    SQLALCHEMY_DATABASE_URI = os.environ.get('TEST_DATABASE_URI', 'sqlite://')
+    SQLALCHEMY_REPLICA_URI = os.environ.get('TEST_REPLICA_URI')
+    JOB_WORKERS = 0
+    RATE_LIMIT_ENABLED = False
+
+
+configs = {
+    'development': DevelopmentConfig,
+    'production': ProductionConfig,
+    'testing': TestingConfig,
+}
+
+
+def get_config(name=None):
+    """The Config class for ``name`` or $APP_ENV (production by default)."""
+    name = name or os.environ.get('APP_ENV', 'production')
+    try:
+        return configs[name]
+    except KeyError:
+        raise ValueError(f"Unknown APP_ENV '{name}'; expected one of {', '.join(configs)}")
+
+
+def engine_options(url, config):
+    """SQLAlchemy engine options for ``url`` from the DB_* settings in ``config``."""
+    options = {'pool_pre_ping': config['DB_POOL_PRE_PING']}
+    backend = make_url(url).get_backend_name()
+    if backend == 'sqlite':
+        # SQLite connections are per file and per thread; pool sizing does not apply
+        options['connect_args'] = {'timeout': config['DB_SQLITE_BUSY_TIMEOUT']}
+        return options
+
+    options.update(
+        pool_size=config['DB_POOL_SIZE'],
+        max_overflow=config['DB_MAX_OVERFLOW'],
+        pool_timeout=config['DB_POOL_TIMEOUT'],
+        pool_recycle=config['DB_POOL_RECYCLE'],
+    )
+    timeout = config['DB_STATEMENT_TIMEOUT_MS']
+    if timeout and backend == 'postgresql':
+        options['connect_args'] = {'options': f'-c statement_timeout={timeout}'}
+    elif timeout and backend in ('mysql', 'mariadb'):
+        options['connect_args'] = {'init_command': f'SET SESSION max_execution_time={timeout}'}
+    return options
+
+
+def configure_engines(config):
+    """Fill in engine options for the primary and the "replica" bind.
+
+    Explicit SQLALCHEMY_ENGINE_OPTIONS / SQLALCHEMY_BINDS settings win.
+    """
+    config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', engine_options(config['SQLALCHEMY_DATABASE_URI'], config))
+    replica = config.get('SQLALCHEMY_REPLICA_URI')
+    if replica:
+        binds = config.setdefault('SQLALCHEMY_BINDS', {})
+        binds.setdefault('replica', {'url': replica, **engine_options(replica, config)})